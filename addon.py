@@ -2,6 +2,13 @@
 
 import bpy
 import mathutils
+import numpy
+import gpu
+from gpu_extras.batch import batch_for_shader
+import zlib
+import struct
+import math
+from collections import OrderedDict
 import json
 import threading
 import socket
@@ -12,10 +19,17 @@ import uuid
 import traceback
 import os
 import shutil
+import hashlib
+import sys
 import types
 from bpy.props import StringProperty, IntProperty, BoolProperty, EnumProperty
 import io
-from contextlib import redirect_stdout
+from contextlib import redirect_stdout, contextmanager
+
+try:
+    import resource # not available on Windows
+except ImportError:
+    resource = None
 
 bl_info = {
     "name": "Casey MCP",
@@ -28,8 +42,10 @@ bl_info = {
 }
 
 OBJECT_NAME = "Object"
+MODIFIER_NAME = "Geo Node Modifier"
 
 initialized_output_node = None
+geo_node_group = None
 
 id_counter = 0
 class BlenderMCPServer:
@@ -43,6 +59,15 @@ class BlenderMCPServer:
         self.output_node = None
         self.viewer_node = None
         self.img_filepath = "/Users/caseymanning/Documents/viewport_render.png"
+        # construction mode: modifier muted while edits accumulate, evaluated once on commit
+        self.construction_mode = False
+        self.pending_viewer_node_id = None
+        self.avoided_evaluations = 0
+        self.render_cache = RenderCache()
+        self.render_jobs = OrderedDict()
+        # render_worker.py blocks Blender's main thread in its own accept loop, so timers never fire there.
+        # it sets this to run render jobs to completion inside start_render instead
+        self.run_jobs_inline = False
 
     def start(self):
         if self.running:
@@ -148,10 +173,8 @@ class BlenderMCPServer:
                         def execute_wrapper():
                             try:
                                 response = self.execute_command(command)
-                                response_json = json.dumps(response).replace('\n', '')
                                 try:
-                                    print("Sending response: ", response_json)
-                                    client.sendall(response_json.encode('utf-8'))
+                                    send_response(client, response)
                                 except:
                                     print("Failed to send response - client disconnected")
                             except Exception as e:
@@ -162,7 +185,7 @@ class BlenderMCPServer:
                                         "status": "error",
                                         "message": str(e)
                                     }
-                                    client.sendall(json.dumps(error_response).encode('utf-8'))
+                                    send_response(client, error_response)
                                 except:
                                     pass
                             return None
@@ -209,13 +232,31 @@ class BlenderMCPServer:
             "set_output_node": self.set_output_node,
             "visually_evaluate_node": self.visually_evaluate_node,
             "set_node_property": self.set_node_property,
-            "set_img_filepath": self.set_img_filepath
+            "set_img_filepath": self.set_img_filepath,
+            "get_node_type_info": self.get_node_type_info,
+            "begin_construction": self.begin_construction,
+            "commit_construction": self.commit_construction,
+            "inspect_node_output": self.inspect_node_output,
+            "profile_graph": self.profile_graph,
+            "read_attributes": self.read_attributes,
+            "export_node_output": self.export_node_output,
+            "render_node_image": self.render_node_image,
+            "get_render_cache_stats": self.get_render_cache_stats,
+            "render_views": self.render_views,
+            "measure_render_tiers": self.measure_render_tiers,
+            "get_graph_spec": self.get_graph_spec,
+            "load_graph_spec": self.load_graph_spec,
+            "start_render": self.start_render,
+            "get_render_job": self.get_render_job,
+            "cancel_render": self.cancel_render
         }
         
         handler = handlers.get(cmd_type)
         if handler:
             try:
                 print(f"Executing handler for {cmd_type}")
+                if self.construction_mode and cmd_type in graph_edit_commands:
+                    self.avoided_evaluations += 1
                 result = handler(**params)
                 print(f"Handler execution complete")
                 return {"status": "success", "result": result}
@@ -252,7 +293,10 @@ class BlenderMCPServer:
 
         print("new_node.outputs[0].type: ", new_node.outputs[0].type)
         if(new_node.outputs[0].type == "GEOMETRY"):
-            self.set_viewer_node(new_node['id'])
+            if self.construction_mode:
+                self.pending_viewer_node_id = new_node['id']
+            else:
+                self.set_viewer_node(new_node['id'])
 
         return {"status": "success", "result": {"nodeId": new_node['id']}}
 
@@ -288,7 +332,7 @@ class BlenderMCPServer:
             if inputSocket.isnumeric():
                 inputSocket = int(inputSocket)
             elif(not inputSocket in node.inputs):
-                if inputSocket.lower() in get_extra_property_names(node):
+                if inputSocket.lower() in get_node_type_metadata(node)["property_name_set"]:
                     return {"status": "error", "message": f"Input socket {inputSocket} not found for node. It looks like you're trying to set a property, not an input. If so, use the set_node_property tool instead."}
                 else:
                     return {"status": "error", "message": f"Input socket {inputSocket} not found for node. Available inputs: {node.inputs.keys()}. Alternatively, pass a number for the input key to set an input by index."}
@@ -398,6 +442,47 @@ class BlenderMCPServer:
 
         return {"status": "success", "message": f"Viewer node set to {self.viewer_node.name}"}
 
+    def get_geo_modifier(self):
+        obj = bpy.context.scene.objects.get(OBJECT_NAME)
+        if obj is None:
+            return None
+        return obj.modifiers.get(MODIFIER_NAME)
+
+    def begin_construction(self):
+        if self.construction_mode:
+            return {"status": "success", "message": "Already in construction mode"}
+
+        mod = self.get_geo_modifier()
+        if mod is None:
+            return {"status": "error", "message": "No geometry node modifier found"}
+
+        # muting the modifier stops the depsgraph from re-evaluating the tree on every edit
+        mod.show_viewport = False
+        mod.show_render = False
+        self.construction_mode = True
+        self.avoided_evaluations = 0
+        return {"status": "success", "message": "Construction mode started, graph evaluation deferred until commit"}
+
+    def commit_construction(self):
+        if not self.construction_mode:
+            return {"status": "success", "result": {"avoided_evaluations": 0}}
+
+        self.construction_mode = False
+        if self.pending_viewer_node_id is not None:
+            self.set_viewer_node(self.pending_viewer_node_id)
+            self.pending_viewer_node_id = None
+
+        mod = self.get_geo_modifier()
+        if mod is not None:
+            mod.show_viewport = True
+            mod.show_render = True
+
+        start = time.perf_counter()
+        bpy.context.view_layer.update()
+        evaluation_ms = (time.perf_counter() - start) * 1000
+
+        return {"status": "success", "result": {"avoided_evaluations": self.avoided_evaluations, "evaluation_ms": round(evaluation_ms, 2)}}
+
     def get_current_output_node(self):
         if self.output_node is None:
             if(initialized_output_node is None):
@@ -409,9 +494,324 @@ class BlenderMCPServer:
             return None
         return input_socket.links[0].from_node
 
+    @contextmanager
+    def evaluated_node_output(self, node_id):
+        """Temporarily route a node to the group output and yield (evaluated object, depsgraph, evaluation ms)"""
+        self.commit_construction()
+        prev_output_node = self.get_current_output_node()
+        self.set_output_node(node_id)
+
+        try:
+            start = time.perf_counter()
+            depsgraph = bpy.context.evaluated_depsgraph_get()
+            depsgraph.update()
+            evaluation_ms = (time.perf_counter() - start) * 1000
+
+            obj = bpy.context.scene.objects[OBJECT_NAME]
+            yield obj.evaluated_get(depsgraph), depsgraph, evaluation_ms
+        finally:
+            if(prev_output_node is not None):
+                self.set_output_node(prev_output_node['id'])
+
+    def inspect_node_output(self, node_id):
+        if(not node_id in self.nodes):
+            return {"status": "error", "message": f"Node with id {node_id} not found"}
+
+        if(self.nodes[node_id].outputs[0].type != "GEOMETRY"):
+            return {"status": "error", "message": f"Node with id {node_id} does not output geometry"}
+
+        with self.evaluated_node_output(node_id) as (obj_eval, depsgraph, evaluation_ms):
+            summary = summarize_geometry(obj_eval, depsgraph)
+
+        summary["evaluation_ms"] = round(evaluation_ms, 2)
+        return {"status": "success", "result": summary}
+
+    def time_modifier_evaluation(self):
+        obj = bpy.context.scene.objects[OBJECT_NAME]
+        obj.update_tag()
+        start = time.perf_counter()
+        bpy.context.evaluated_depsgraph_get().update()
+        return (time.perf_counter() - start) * 1000
+
+    def profile_graph(self):
+        if geo_node_group is None:
+            return {"status": "error", "message": "No geometry node group found"}
+
+        self.commit_construction()
+        total_ms = self.time_modifier_evaluation()
+
+        # Blender does not expose its per-node timings to Python, so time each geometry node's
+        # cumulative evaluation by routing it to the output, then subtract its slowest upstream input
+        cumulative_ms = {}
+        for node_id, node in list(self.nodes.items()):
+            if node == self.viewer_node or len(node.outputs) == 0 or node.outputs[0].type != "GEOMETRY":
+                continue
+            with self.evaluated_node_output(node_id) as (obj_eval, depsgraph, evaluation_ms):
+                cumulative_ms[node_id] = evaluation_ms
+
+        profile = []
+        for node_id, node_ms in cumulative_ms.items():
+            node = self.nodes[node_id]
+            upstream_ms = [cumulative_ms[link.from_node['id']]
+                           for socket in node.inputs if socket.type == "GEOMETRY"
+                           for link in socket.links if link.from_node.get('id') in cumulative_ms]
+            self_ms = max(node_ms - max(upstream_ms, default=0.0), 0.0)
+            profile.append({"id": node_id, "name": node.name, "self_ms": round(self_ms, 2), "cumulative_ms": round(node_ms, 2)})
+
+        profile.sort(key=lambda entry: entry["self_ms"], reverse=True)
+
+        result = {
+            "nodes": profile,
+            "total_ms": round(total_ms, 2),
+            "timing_source": "viewer_bisection",
+            # the whole process's lifetime peak, not what this graph costs
+            "process_peak_rss_mb": get_process_peak_rss_mb(),
+        }
+        return {"status": "success", "result": result}
+
+    def read_attributes(self, node_id, names=None, start=0, count=None, stride=1):
+        """Read evaluated vertex positions, normals and named attributes as raw binary frames
+
+        Parameters:
+        - names: attribute names to read, defaults to position and normal
+        - start, count: element range to read, for paging through large meshes
+        - stride: keep every nth element
+        """
+        if(not node_id in self.nodes):
+            return {"status": "error", "message": f"Node with id {node_id} not found"}
+
+        if stride < 1:
+            return {"status": "error", "message": "stride must be at least 1"}
+
+        names = names or ["position", "normal"]
+
+        with self.evaluated_node_output(node_id) as (obj_eval, depsgraph, evaluation_ms):
+            mesh = obj_eval.data
+            headers = []
+            frames = []
+            for name in names:
+                try:
+                    array, domain = read_mesh_attribute(mesh, name)
+                except KeyError as e:
+                    return {"status": "error", "message": str(e)}
+
+                stop = len(array) if count is None else min(start + count, len(array))
+                array = numpy.ascontiguousarray(array[start:stop:stride])
+                headers.append({"name": name, "domain": domain, "dtype": array.dtype.str, "shape": list(array.shape), "nbytes": array.nbytes})
+                frames.append(array)
+
+        result = {"frames": headers, "evaluation_ms": round(evaluation_ms, 2)}
+        return {"status": "success", "result": result, "binary_frames": frames}
+
+    def export_node_output(self, node_id, known_hash=None):
+        """Encode a node's evaluated mesh as binary PLY frames, skipped if its hash matches known_hash"""
+        if(not node_id in self.nodes):
+            return {"status": "error", "message": f"Node with id {node_id} not found"}
+
+        with self.evaluated_node_output(node_id) as (obj_eval, depsgraph, evaluation_ms):
+            frames = encode_ply(obj_eval.data)
+
+        content_hash = hashlib.sha256()
+        for frame in frames:
+            content_hash.update(memoryview(frame).cast('B'))
+        content_hash = content_hash.hexdigest()
+
+        if content_hash == known_hash:
+            return {"status": "success", "result": {"hash": content_hash, "unchanged": True}}
+
+        headers = [{"name": name, "nbytes": frame.nbytes} for name, frame in zip(("header", "vertices", "faces"), frames)]
+        result = {"format": "ply", "hash": content_hash, "unchanged": False, "frames": headers, "evaluation_ms": round(evaluation_ms, 2)}
+        return {"status": "success", "result": result, "binary_frames": frames}
+
+    def start_render(self, node_id, tier="preview", views=None, tile_size=512):
+        """Queue a render that runs in small steps on Blender's main thread. Returns a job id to poll"""
+        if(not node_id in self.nodes):
+            return {"status": "error", "message": f"Node with id {node_id} not found"}
+        if tier not in render_tiers:
+            return {"status": "error", "message": f"Unknown quality tier {tier}. Available tiers: {list(render_tiers.keys())}"}
+        if views is not None and any(view not in view_directions for view in views):
+            return {"status": "error", "message": f"Unknown views in {views}. Available views: {list(view_directions.keys())}"}
+
+        job = RenderJob(uuid.uuid4().hex[:12], node_id, tier, views, tile_size)
+        self.render_jobs[job.id] = job
+        self.forget_finished_jobs()
+
+        steps = self.run_render_job(job)
+
+        def step():
+            try:
+                next(steps)
+                return 0.0
+            except StopIteration:
+                return None
+            except Exception as e:
+                traceback.print_exc()
+                job.finish("error", error=str(e))
+                return None
+
+        if self.run_jobs_inline:
+            while step() is not None:
+                pass
+        else:
+            bpy.app.timers.register(step, first_interval=0.0)
+        return {"status": "success", "result": {"job_id": job.id}}
+
+    def run_render_job(self, job):
+        """Generator that advances a render job one step per timer tick, so other commands can run in between"""
+        if job.cancelled:
+            job.finish("cancelled")
+            return
+        job.status = "running"
+        settings = dict(render_tiers[job.tier])
+        settings["size"] = settings["size"] or bpy.context.scene.render.resolution_x
+        if job.views is not None:
+            settings.update(views=job.views, tile_size=job.tile_size)
+            tile_size, directions = job.tile_size, [view_directions[view] for view in job.views]
+        else:
+            tile_size, directions = settings["size"], [DEFAULT_VIEW_DIRECTION]
+        samples = settings["samples"]
+
+        cache_key = hash_subgraph(self.nodes[job.node_id], settings)
+        image = self.render_cache.get(cache_key)
+        if image is None:
+            with self.evaluated_node_output(job.node_id) as (obj_eval, depsgraph, evaluation_ms):
+                geometry = get_render_geometry(obj_eval)
+            job.progress = 0.2
+            yield
+
+            tiles = []
+            for direction in directions:
+                if job.cancelled:
+                    job.finish("cancelled")
+                    return
+                tiles.append(draw_geometry(geometry, tile_size * samples, direction))
+                job.progress = 0.2 + 0.7 * len(tiles) / len(directions)
+                yield
+
+            pixels = composite_tiles(tiles, tile_size * samples) if job.views is not None else tiles[0]
+            pixels = supersample(pixels, samples)
+            image = numpy.frombuffer(encode_image(pixels, settings["file_format"], settings["quality"]), dtype=numpy.uint8)
+            self.render_cache.put(cache_key, image)
+
+        job.image = image
+        job.mime_type = image_mime_types[settings["file_format"]]
+        job.finish("done")
+
+    def get_render_job(self, job_id):
+        """Status and progress of a render job, with the image attached as a binary frame once it is done"""
+        job = self.render_jobs.get(job_id)
+        if job is None:
+            return {"status": "error", "message": f"Render job {job_id} not found"}
+
+        result = job.describe()
+        if job.status != "done":
+            return {"status": "success", "result": result}
+
+        result["frames"] = [{"name": "image", "mime_type": job.mime_type, "nbytes": job.image.nbytes}]
+        if job.views is not None:
+            columns = math.ceil(math.sqrt(len(job.views)))
+            result["layout"] = [job.views[i:i + columns] for i in range(0, len(job.views), columns)]
+        return {"status": "success", "result": result, "binary_frames": [job.image]}
+
+    def cancel_render(self, job_id):
+        job = self.render_jobs.get(job_id)
+        if job is None:
+            return {"status": "error", "message": f"Render job {job_id} not found"}
+        if job.status in ("queued", "running"):
+            job.cancelled = True
+        return {"status": "success", "result": job.describe()}
+
+    def forget_finished_jobs(self, keep=32):
+        finished = [job_id for job_id, job in self.render_jobs.items() if job.status in ("done", "error", "cancelled")]
+        for job_id in finished[:max(len(finished) - keep, 0)]:
+            del self.render_jobs[job_id]
+
+    def render_node_image(self, node_id, tier="preview", size=None):
+        """Render a node's evaluated geometry offscreen and return it as an in-memory image frame.
+        Does not need a 3D viewport, so it works in background mode and leaves the user's view alone."""
+        if tier not in render_tiers:
+            return {"status": "error", "message": f"Unknown quality tier {tier}. Available tiers: {list(render_tiers.keys())}"}
+
+        settings = dict(render_tiers[tier])
+        settings["size"] = size or settings["size"] or bpy.context.scene.render.resolution_x
+        samples = settings["samples"]
+        return self.cached_render(node_id, settings, lambda obj_eval: supersample(render_geometry(obj_eval, settings["size"] * samples), samples))
+
+    def render_views(self, node_id, views=None, tile_size=512, tier="preview"):
+        """Render several canonical views of a node's output in one pass, composited into a grid image"""
+        views = views or ["front", "side", "top", "iso"]
+        unknown = [view for view in views if view not in view_directions]
+        if unknown:
+            return {"status": "error", "message": f"Unknown views {unknown}. Available views: {list(view_directions.keys())}"}
+        if tier not in render_tiers:
+            return {"status": "error", "message": f"Unknown quality tier {tier}. Available tiers: {list(render_tiers.keys())}"}
+
+        settings = dict(render_tiers[tier], views=views, tile_size=tile_size)
+        samples = settings["samples"]
+        response = self.cached_render(node_id, settings,
+                                      lambda obj_eval: supersample(render_contact_sheet(obj_eval, views, tile_size * samples), samples))
+        if response["status"] == "success":
+            columns = math.ceil(math.sqrt(len(views)))
+            response["result"]["layout"] = [views[i:i + columns] for i in range(0, len(views), columns)]
+        return response
+
+    def cached_render(self, node_id, render_settings, render_pixels, use_cache=True):
+        """Return an encoded image frame for a node from the render cache, or by calling render_pixels(obj_eval) on a miss"""
+        if(not node_id in self.nodes):
+            return {"status": "error", "message": f"Node with id {node_id} not found"}
+
+        file_format = render_settings["file_format"]
+        cache_key = hash_subgraph(self.nodes[node_id], render_settings)
+
+        image = self.render_cache.get(cache_key) if use_cache else None
+        if image is not None:
+            result = {"frames": [{"name": "image", "mime_type": image_mime_types[file_format], "nbytes": image.nbytes}],
+                      "cache": self.render_cache.stats(hit=True)}
+            return {"status": "success", "result": result, "binary_frames": [image]}
+
+        with self.evaluated_node_output(node_id) as (obj_eval, depsgraph, evaluation_ms):
+            start = time.perf_counter()
+            pixels = render_pixels(obj_eval)
+            render_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        image = numpy.frombuffer(encode_image(pixels, file_format, render_settings["quality"]), dtype=numpy.uint8)
+        encode_ms = (time.perf_counter() - start) * 1000
+
+        self.render_cache.put(cache_key, image)
+        result = {"frames": [{"name": "image", "mime_type": image_mime_types[file_format], "nbytes": image.nbytes}],
+                  "evaluation_ms": round(evaluation_ms, 2), "render_ms": round(render_ms, 2), "encode_ms": round(encode_ms, 2),
+                  "cache": self.render_cache.stats(hit=False)}
+        return {"status": "success", "result": result, "binary_frames": [image]}
+
+    def measure_render_tiers(self, node_id):
+        """Render a node once per quality tier, bypassing the cache, and report time and payload size"""
+        measurements = {}
+        for tier, tier_settings in render_tiers.items():
+            settings = dict(tier_settings)
+            settings["size"] = settings["size"] or bpy.context.scene.render.resolution_x
+            samples = settings["samples"]
+            response = self.cached_render(node_id, settings,
+                                          lambda obj_eval: supersample(render_geometry(obj_eval, settings["size"] * samples), samples),
+                                          use_cache=False)
+            if response["status"] != "success":
+                return response
+
+            result = response["result"]
+            measurements[tier] = {"size": settings["size"], "file_format": settings["file_format"], "nbytes": result["frames"][0]["nbytes"],
+                                  "render_ms": result["render_ms"], "encode_ms": result["encode_ms"]}
+
+        return {"status": "success", "result": measurements}
+
+    def get_render_cache_stats(self):
+        return {"status": "success", "result": self.render_cache.stats()}
+
     def visually_evaluate_node(self, node_id):
         scene = bpy.context.scene
 
+        # rendering needs evaluated geometry, so flush any deferred construction first
+        self.commit_construction()
+
         prev_output_node = self.get_current_output_node()
 
         obj = bpy.context.scene.objects[OBJECT_NAME]
@@ -525,9 +925,664 @@ class BlenderMCPServer:
 
         return {"status": "success", "result": nodesData}
 
+    def get_node_type_info(self, node_type=None):
+        if geo_node_group is None:
+            return {"status": "error", "message": "No geometry node group found"}
+
+        if node_type is None:
+            metadata = {name: serialize_node_type_metadata(data) for name, data in node_type_metadata.items()}
+            return {"status": "success", "result": metadata}
+
+        try:
+            metadata = get_node_type_metadata_by_type(node_type)
+        except RuntimeError as e:
+            return {"status": "error", "message": f"Unknown node type {node_type}: {str(e)}"}
+
+        return {"status": "success", "result": serialize_node_type_metadata(metadata)}
+
+    def get_graph_spec(self):
+        """Serializable description of the whole graph, enough to rebuild it in another Blender instance"""
+        if geo_node_group is None:
+            return {"status": "error", "message": "No geometry node group found"}
+
+        spec = {"nodes": [], "links": []}
+        for node in geo_node_group.nodes:
+            if node.get('id') is None:
+                node['id'] = self.generate_id()
+                self.nodes[node['id']] = node
+
+            properties = {}
+            for name in get_extra_property_names(node):
+                value = serialize_value(getattr(node, name, None))
+                if value is not None:
+                    properties[name] = value
+
+            inputs = {}
+            for input_socket in node.inputs:
+                if not input_socket.is_linked and hasattr(input_socket, "default_value"):
+                    value = serialize_value(input_socket.default_value)
+                    if value is not None:
+                        inputs[input_socket.identifier] = value
+
+            spec["nodes"].append({"id": node['id'], "type": node.bl_idname, "properties": properties, "inputs": inputs})
+
+        for link in geo_node_group.links:
+            spec["links"].append({"from_node": link.from_node['id'], "from_socket": link.from_socket.identifier,
+                                  "to_node": link.to_node['id'], "to_socket": link.to_socket.identifier})
+
+        return {"status": "success", "result": spec}
+
+    def load_graph_spec(self, spec):
+        """Replace the graph with one described by get_graph_spec, keeping the node ids"""
+        global id_counter, initialized_output_node
+        if geo_node_group is None:
+            return {"status": "error", "message": "No geometry node group found"}
+
+        # a previous session may have stopped mid-construction: its pending viewer id would point at
+        # whichever loaded node reuses that id, and the modifier would stay muted
+        self.construction_mode = False
+        self.pending_viewer_node_id = None
+        mod = self.get_geo_modifier()
+        if mod is not None:
+            mod.show_viewport = True
+            mod.show_render = True
+
+        geo_node_group.nodes.clear()
+        self.nodes = {}
+        self.output_node = None
+        self.viewer_node = None
+        initialized_output_node = None
+
+        for node_spec in spec["nodes"]:
+            node = geo_node_group.nodes.new(node_spec["type"])
+            node['id'] = node_spec["id"]
+            self.nodes[node['id']] = node
+            id_counter = max(id_counter, node['id'])
+
+            # properties first, they can change which sockets exist
+            for name, value in node_spec["properties"].items():
+                try:
+                    setattr(node, name, value)
+                except (AttributeError, TypeError, ValueError) as e:
+                    print(f"Could not set property {name} on {node.name}: {str(e)}")
+
+            sockets = {socket.identifier: socket for socket in node.inputs}
+            for identifier, value in node_spec["inputs"].items():
+                if identifier in sockets:
+                    sockets[identifier].default_value = value
+
+            if node.bl_idname == "NodeGroupOutput":
+                initialized_output_node = node
+                self.output_node = node
+            elif node.bl_idname == "GeometryNodeViewer":
+                self.viewer_node = node
+
+        for link in spec["links"]:
+            from_node = self.nodes[link["from_node"]]
+            to_node = self.nodes[link["to_node"]]
+            from_socket = next(s for s in from_node.outputs if s.identifier == link["from_socket"])
+            to_socket = next(s for s in to_node.inputs if s.identifier == link["to_socket"])
+            geo_node_group.links.new(from_socket, to_socket)
+
+        return {"status": "success", "message": f"Loaded graph with {len(self.nodes)} nodes"}
+
     def ping(self):
         return {"status": "success", "message": "Pong"}
 
+# attribute data_type -> (foreach_get field, components, numpy dtype)
+attribute_layouts = {
+    "FLOAT": ("value", 1, "float32"),
+    "INT": ("value", 1, "int32"),
+    "INT8": ("value", 1, "int32"),
+    "BOOLEAN": ("value", 1, "bool"),
+    "FLOAT_VECTOR": ("vector", 3, "float32"),
+    "FLOAT2": ("vector", 2, "float32"),
+    "INT32_2D": ("value", 2, "int32"),
+    "FLOAT_COLOR": ("color", 4, "float32"),
+    "BYTE_COLOR": ("color", 4, "float32"),
+    "QUATERNION": ("value", 4, "float32"),
+    "FLOAT4X4": ("value", 16, "float32"),
+}
+
+def read_mesh_attribute(mesh, name):
+    """Copy a mesh attribute into a numpy buffer with foreach_get. Returns (array, domain)"""
+    if name == "normal":
+        array = numpy.empty((len(mesh.vertices), 3), dtype=numpy.float32)
+        if hasattr(mesh, "vertex_normals"):
+            mesh.vertex_normals.foreach_get("vector", array.ravel())
+        else:
+            mesh.vertices.foreach_get("normal", array.ravel())
+        return array, "POINT"
+
+    attribute = mesh.attributes.get(name)
+    if attribute is None:
+        raise KeyError(f"Attribute {name} not found. Available attributes: {mesh.attributes.keys()}")
+    if attribute.data_type not in attribute_layouts:
+        raise KeyError(f"Attribute {name} has unsupported type {attribute.data_type}")
+
+    field, components, dtype = attribute_layouts[attribute.data_type]
+    shape = (len(attribute.data), components) if components > 1 else (len(attribute.data),)
+    array = numpy.empty(shape, dtype=dtype)
+    attribute.data.foreach_get(field, array.ravel())
+    return array, attribute.domain
+
+def encode_ply(mesh):
+    """Binary little-endian PLY of a mesh as [header, vertices, faces] numpy buffers"""
+    vertices = numpy.empty((len(mesh.vertices), 3), dtype="<f4")
+    mesh.vertices.foreach_get("co", vertices.ravel())
+
+    face_count = len(mesh.polygons)
+    loop_starts = numpy.empty(face_count, dtype=numpy.int32)
+    loop_totals = numpy.empty(face_count, dtype=numpy.int32)
+    loop_vertices = numpy.empty(len(mesh.loops), dtype=numpy.int32)
+    mesh.polygons.foreach_get("loop_start", loop_starts)
+    mesh.polygons.foreach_get("loop_total", loop_totals)
+    mesh.loops.foreach_get("vertex_index", loop_vertices)
+
+    # each face is written as [count, i0, i1, ...]; an int count keeps the whole block int32 aligned
+    faces = numpy.empty(face_count + len(loop_vertices), dtype="<i4")
+    count_positions = loop_starts + numpy.arange(face_count, dtype=numpy.int32)
+    is_index = numpy.ones(len(faces), dtype=bool)
+    is_index[count_positions] = False
+    faces[count_positions] = loop_totals
+    faces[is_index] = loop_vertices
+
+    header = (
+        "ply\nformat binary_little_endian 1.0\n"
+        f"element vertex {len(vertices)}\n"
+        "property float x\nproperty float y\nproperty float z\n"
+        f"element face {face_count}\n"
+        "property list int int vertex_indices\n"
+        "end_header\n"
+    )
+    return [numpy.frombuffer(header.encode('ascii'), dtype=numpy.uint8), vertices, faces]
+
+def serialize_value(value):
+    """JSON-compatible form of an RNA value, or None for values that can't be carried over (e.g. ID pointers)"""
+    if isinstance(value, (bool, int, float, str)):
+        return value
+    if type(value).__name__ in ("bpy_prop_array", "Vector", "Euler", "Color", "Quaternion"):
+        return [i for i in value]
+    return None
+
+def get_socket_value(socket):
+    if not hasattr(socket, "default_value"):
+        return None
+    value = socket.default_value
+    if type(value).__name__ in ("bpy_prop_array", "Vector", "Euler", "Color", "Quaternion"):
+        return [round(i, 6) for i in value]
+    return str(value)
+
+def hash_subgraph(node, render_settings):
+    """Stable hash of the subgraph feeding a node: types, properties, unlinked input values and links.
+    Nodes are numbered in traversal order so the hash does not depend on node ids or names."""
+    order = {}
+    entries = []
+
+    def visit(current):
+        if current.name in order:
+            return order[current.name]
+        order[current.name] = len(order)
+
+        entry = {"type": current.bl_idname, "inputs": [], "properties": {}}
+        entries.append(entry)
+        for name in get_node_type_metadata(current)["property_names"]:
+            entry["properties"][name] = str(getattr(current, name, None))
+
+        for input_socket in current.inputs:
+            if input_socket.is_linked:
+                links = [(visit(link.from_node), link.from_socket.identifier) for link in input_socket.links]
+                entry["inputs"].append({"socket": input_socket.identifier, "links": links})
+            else:
+                entry["inputs"].append({"socket": input_socket.identifier, "value": get_socket_value(input_socket)})
+        return order[current.name]
+
+    visit(node)
+    # the cache directory is shared with other Blender processes, which may draw with the other renderer
+    render_settings = dict(render_settings, render_path=get_render_path())
+    content = json.dumps({"nodes": entries, "render": render_settings}, sort_keys=True)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+class RenderJob:
+    """State of an asynchronous render started with start_render"""
+
+    def __init__(self, job_id, node_id, tier, views, tile_size):
+        self.id = job_id
+        self.node_id = node_id
+        self.tier = tier
+        self.views = views
+        self.tile_size = tile_size
+        self.status = "queued"
+        self.progress = 0.0
+        self.cancelled = False
+        self.error = None
+        self.image = None
+        self.mime_type = None
+        self.started = time.perf_counter()
+        self.elapsed_ms = None
+
+    def finish(self, status, error=None):
+        self.status = status
+        self.error = error
+        self.progress = 1.0 if status == "done" else self.progress
+        self.elapsed_ms = round((time.perf_counter() - self.started) * 1000, 2)
+
+    def describe(self):
+        description = {"job_id": self.id, "node_id": self.node_id, "status": self.status, "progress": round(self.progress, 2)}
+        if self.error is not None:
+            description["error"] = self.error
+        if self.elapsed_ms is not None:
+            description["elapsed_ms"] = self.elapsed_ms
+        return description
+
+class RenderCache:
+    """Bounded LRU of rendered images keyed by subgraph hash, mirrored to a directory on disk"""
+
+    def __init__(self, max_entries=64, max_disk_entries=512, directory=None):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.directory = directory or os.path.join(tempfile.gettempdir(), "geonodes_mcp_render_cache")
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def get_path(self, key):
+        return os.path.join(self.directory, key + ".bin")
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return self.entries[key]
+
+        path = self.get_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = numpy.frombuffer(f.read(), dtype=numpy.uint8)
+            os.utime(path)
+        except OSError:
+            # not cached, or evicted by another process sharing the directory
+            self.misses += 1
+            return None
+        self.remember(key, data)
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        self.remember(key, data)
+        # other processes read this directory too, so a file only appears once it is completely written
+        path = self.get_path(key)
+        temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        self.evict_disk()
+
+    def remember(self, key, data):
+        self.entries[key] = data
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def evict_disk(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".bin"):
+                path = os.path.join(self.directory, name)
+                try:
+                    files.append((os.path.getmtime(path), path))
+                except OSError:
+                    pass
+        if len(files) <= self.max_disk_entries:
+            return
+        files.sort()
+        for mtime, path in files[:len(files) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self, hit=None):
+        stats = {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
+        if hit is not None:
+            stats["hit"] = hit
+        return stats
+
+DEFAULT_VIEW_DIRECTION = (1.0, -1.0, 0.8)
+
+view_directions = {
+    "front": (0.0, -1.0, 0.0),
+    "back": (0.0, 1.0, 0.0),
+    "side": (1.0, 0.0, 0.0),
+    "top": (0.0, 0.0, 1.0),
+    "bottom": (0.0, 0.0, -1.0),
+    "iso": DEFAULT_VIEW_DIRECTION,
+}
+LIGHT_DIRECTION = mathutils.Vector((0.4, -0.6, 0.7)).normalized()
+CAMERA_FOV = math.radians(40)
+
+def get_smooth_color_shader():
+    try:
+        return gpu.shader.from_builtin('SMOOTH_COLOR')
+    except ValueError: # Blender 3.x name
+        return gpu.shader.from_builtin('3D_SMOOTH_COLOR')
+
+def get_shaded_triangles(obj_eval):
+    """World space triangle corners and flat-shaded vertex colors for a mesh"""
+    mesh = obj_eval.data
+    mesh.calc_loop_triangles()
+    tri_count = len(mesh.loop_triangles)
+
+    co = numpy.empty((len(mesh.vertices), 3), dtype=numpy.float32)
+    mesh.vertices.foreach_get("co", co.ravel())
+    triangles = numpy.empty((tri_count, 3), dtype=numpy.int32)
+    mesh.loop_triangles.foreach_get("vertices", triangles.ravel())
+    normals = numpy.empty((tri_count, 3), dtype=numpy.float32)
+    mesh.loop_triangles.foreach_get("normal", normals.ravel())
+
+    matrix = numpy.array(obj_eval.matrix_world, dtype=numpy.float32)
+    co = co @ matrix[:3, :3].T + matrix[:3, 3]
+    normals = normals @ matrix[:3, :3].T
+
+    light = numpy.array(LIGHT_DIRECTION, dtype=numpy.float32)
+    intensity = numpy.abs(normals @ light) * 0.75 + 0.2
+    colors = numpy.ones((tri_count, 4), dtype=numpy.float32)
+    colors[:, :3] = intensity[:, None] * 0.8
+
+    positions = co[triangles].reshape(-1, 3)
+    colors = numpy.repeat(colors, 3, axis=0)
+    return positions, colors
+
+def get_camera_matrices(bb_min, bb_max, direction, fov=CAMERA_FOV):
+    """View and projection matrices framing a world space bounding box from a direction"""
+    center = (mathutils.Vector(bb_min) + mathutils.Vector(bb_max)) / 2
+    radius = max((mathutils.Vector(bb_max) - center).length, 1e-3)
+    distance = radius / math.sin(fov / 2) * 1.1
+    eye = center + mathutils.Vector(direction).normalized() * distance
+
+    up = 'Z' if abs(mathutils.Vector(direction).normalized().z) < 0.99 else 'Y'
+    rotation = (center - eye).to_track_quat('-Z', up).to_matrix().to_4x4()
+    view_matrix = (mathutils.Matrix.Translation(eye) @ rotation).inverted()
+
+    near, far = distance * 0.01, distance + radius * 2
+    f = 1 / math.tan(fov / 2)
+    projection_matrix = mathutils.Matrix((
+        (f, 0, 0, 0),
+        (0, f, 0, 0),
+        (0, 0, (far + near) / (near - far), 2 * far * near / (near - far)),
+        (0, 0, -1, 0),
+    ))
+    return view_matrix, projection_matrix
+
+def get_render_geometry(obj_eval):
+    """Everything draw_geometry needs from an evaluated object, so drawing can happen after the output is restored"""
+    positions, colors = get_shaded_triangles(obj_eval)
+    return positions, colors, get_bounding_box(obj_eval)
+
+def get_render_path():
+    """Which renderer draw_geometry uses in this process. The two produce slightly different images"""
+    return "background" if bpy.app.background else "offscreen"
+
+def render_geometry(obj_eval, size, direction=DEFAULT_VIEW_DIRECTION):
+    return draw_geometry(get_render_geometry(obj_eval), size, direction)
+
+def draw_geometry(geometry, size, direction=DEFAULT_VIEW_DIRECTION):
+    """Draw extracted geometry into an offscreen buffer. Returns an RGBA uint8 array, top row first"""
+    if get_render_path() == "background":
+        # blender -b has no GPU drawing, so go through the render pipeline instead
+        return render_geometry_background(geometry, size, direction)
+
+    positions, colors, bounding_box = geometry
+    view_matrix, projection_matrix = get_camera_matrices(bounding_box["min"], bounding_box["max"], direction)
+
+    shader = get_smooth_color_shader()
+    batch = batch_for_shader(shader, 'TRIS', {"pos": positions, "color": colors})
+
+    offscreen = gpu.types.GPUOffScreen(size, size)
+    try:
+        with offscreen.bind():
+            framebuffer = gpu.state.active_framebuffer_get()
+            framebuffer.clear(color=(1.0, 1.0, 1.0, 1.0), depth=1.0)
+            gpu.state.depth_test_set('LESS_EQUAL')
+            gpu.state.depth_mask_set(True)
+            if len(positions) > 0:
+                with gpu.matrix.push_pop():
+                    gpu.matrix.load_matrix(view_matrix)
+                    gpu.matrix.load_projection_matrix(projection_matrix)
+                    batch.draw(shader)
+            gpu.state.depth_test_set('NONE')
+            buffer = framebuffer.read_color(0, 0, size, size, 4, 0, 'UBYTE')
+    finally:
+        offscreen.free()
+
+    buffer.dimensions = size * size * 4
+    pixels = numpy.array(buffer, dtype=numpy.uint8).reshape(size, size, 4)
+    return numpy.ascontiguousarray(pixels[::-1])
+
+def srgb_to_linear(colors):
+    return numpy.where(colors <= 0.04045, colors / 12.92, ((colors + 0.055) / 1.055) ** 2.4)
+
+def render_geometry_background(geometry, size, direction=DEFAULT_VIEW_DIRECTION):
+    """Render extracted geometry with Workbench in a temporary scene, for background mode where
+    draw_geometry's offscreen drawing isn't available. Returns the same RGBA uint8 array, top row first"""
+    positions, colors, bounding_box = geometry
+    if len(positions) == 0:
+        return numpy.full((size, size, 4), 255, dtype=numpy.uint8)
+    view_matrix, _ = get_camera_matrices(bounding_box["min"], bounding_box["max"], direction)
+
+    scene = bpy.data.scenes.new("mcp_render")
+    world = bpy.data.worlds.new("mcp_render")
+    mesh = bpy.data.meshes.new("mcp_render")
+    camera_data = bpy.data.cameras.new("mcp_render")
+    obj = bpy.data.objects.new("mcp_render", mesh)
+    camera = bpy.data.objects.new("mcp_render_camera", camera_data)
+    image = None
+    path = os.path.join(tempfile.gettempdir(), f"mcp_render_{uuid.uuid4().hex}.png")
+
+    try:
+        mesh.from_pydata(positions, [], numpy.arange(len(positions)).reshape(-1, 3))
+        # the shaded colors are display values, as the offscreen path draws them. Stored linear,
+        # they come back out unchanged through the Standard view transform
+        attribute = mesh.color_attributes.new("mcp_shading", 'FLOAT_COLOR', 'CORNER')
+        attribute.data.foreach_set("color", srgb_to_linear(colors).ravel())
+        mesh.color_attributes.active_color = attribute
+
+        camera.matrix_world = view_matrix.inverted()
+        camera_data.angle = CAMERA_FOV
+        center = (mathutils.Vector(bounding_box["min"]) + mathutils.Vector(bounding_box["max"])) / 2
+        distance = (center - camera.matrix_world.translation).length
+        radius = max((mathutils.Vector(bounding_box["max"]) - center).length, 1e-3)
+        camera_data.clip_start, camera_data.clip_end = distance * 0.01, distance + radius * 2
+        scene.collection.objects.link(obj)
+        scene.collection.objects.link(camera)
+        scene.camera = camera
+
+        world.color = (1.0, 1.0, 1.0)
+        scene.world = world
+        scene.render.engine = 'BLENDER_WORKBENCH'
+        scene.render.resolution_x = scene.render.resolution_y = size
+        scene.render.resolution_percentage = 100
+        scene.render.film_transparent = False
+        scene.render.dither_intensity = 0.0
+        scene.render.image_settings.file_format = 'PNG'
+        scene.render.image_settings.color_mode = 'RGBA'
+        scene.render.filepath = path
+        scene.view_settings.view_transform = 'Standard'
+        scene.view_settings.look = 'None'
+
+        # flat lighting shows the vertex colors as they are, which already carry the shading
+        shading = scene.display.shading
+        shading.light = 'FLAT'
+        shading.color_type = 'VERTEX'
+        shading.show_object_outline = False
+        shading.show_cavity = False
+        shading.show_shadows = False
+        shading.show_specular_highlight = False
+
+        bpy.ops.render.render(write_still=True, scene=scene.name)
+
+        image = bpy.data.images.load(path)
+        pixels = numpy.empty(size * size * 4, dtype=numpy.float32)
+        image.pixels.foreach_get(pixels)
+        pixels = (pixels * 255).round().astype(numpy.uint8).reshape(size, size, 4)
+        pixels[:, :, 3] = 255
+        # Blender images are stored bottom row first
+        return numpy.ascontiguousarray(pixels[::-1])
+    finally:
+        if image is not None:
+            bpy.data.images.remove(image)
+        bpy.data.objects.remove(obj)
+        bpy.data.objects.remove(camera)
+        bpy.data.meshes.remove(mesh)
+        bpy.data.cameras.remove(camera_data)
+        bpy.data.worlds.remove(world)
+        bpy.data.scenes.remove(scene)
+        if os.path.exists(path):
+            os.remove(path)
+
+# quality tier -> resolution (None = scene resolution), encoding and supersampling factor
+render_tiers = {
+    "thumbnail": {"size": 256, "file_format": "JPEG", "quality": 70, "samples": 1},
+    "preview": {"size": 512, "file_format": "JPEG", "quality": 85, "samples": 2},
+    "final": {"size": None, "file_format": "PNG", "quality": 90, "samples": 2},
+}
+
+image_mime_types = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+def supersample(pixels, samples):
+    """Box-filter an image rendered at samples times the target resolution back down to it"""
+    if samples <= 1:
+        return pixels
+    height, width, channels = pixels.shape
+    blocks = pixels.reshape(height // samples, samples, width // samples, samples, channels)
+    return blocks.mean(axis=(1, 3)).round().astype(numpy.uint8)
+
+def encode_image(pixels, file_format, quality):
+    """Encode an RGBA uint8 array (top row first). PNG is encoded in memory, other formats through Blender's image writer"""
+    if file_format == "PNG":
+        return encode_png(pixels)
+
+    height, width, _ = pixels.shape
+    image = bpy.data.images.new("mcp_encode", width, height, alpha=False)
+    path = os.path.join(tempfile.gettempdir(), f"mcp_encode_{uuid.uuid4().hex}.{file_format.lower()}")
+
+    try:
+        # Blender images are stored bottom row first
+        image.pixels.foreach_set((pixels[::-1].astype(numpy.float32) / 255).ravel())
+        image.file_format = file_format
+        # Image.save writes the pixels as they are. save_render would apply the scene's view transform
+        # (AgX/Filmic) to pixels that are already display-referred, unlike the in-memory PNG tier
+        image.save(filepath=path, quality=quality)
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        bpy.data.images.remove(image)
+        if os.path.exists(path):
+            os.remove(path)
+
+def render_contact_sheet(obj_eval, views, tile_size):
+    """Render each view into a tile of a square-ish grid. Returns one RGBA array"""
+    geometry = get_render_geometry(obj_eval)
+    return composite_tiles([draw_geometry(geometry, tile_size, view_directions[view]) for view in views], tile_size)
+
+def composite_tiles(tiles, tile_size):
+    columns = math.ceil(math.sqrt(len(tiles)))
+    rows = math.ceil(len(tiles) / columns)
+    sheet = numpy.full((rows * tile_size, columns * tile_size, 4), 255, dtype=numpy.uint8)
+
+    for i, tile in enumerate(tiles):
+        row, column = divmod(i, columns)
+        sheet[row * tile_size:(row + 1) * tile_size, column * tile_size:(column + 1) * tile_size] = tile
+        # thin separator so the model can tell tiles apart
+        sheet[row * tile_size, column * tile_size:(column + 1) * tile_size, :3] = 160
+        sheet[row * tile_size:(row + 1) * tile_size, column * tile_size, :3] = 160
+
+    return sheet
+
+def encode_png(pixels):
+    """Encode an RGBA uint8 array as PNG bytes without touching disk"""
+    height, width, channels = pixels.shape
+    rows = numpy.zeros((height, width * channels + 1), dtype=numpy.uint8) # leading 0 = no filter
+    rows[:, 1:] = pixels.reshape(height, -1)
+
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xffffffff)
+
+    color_type = {1: 0, 3: 2, 4: 6}[channels]
+    header = struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows.tobytes(), 6)) + chunk(b"IEND", b"")
+
+def pop_binary_frames(response):
+    """Take binary frames out of a command response so the rest can be sent as JSON"""
+    result = response.get("result")
+    if not isinstance(result, dict):
+        return None
+    return result.pop("binary_frames", None)
+
+def send_response(client, response, chunk_size=4 * 1024 * 1024):
+    """Send a response as a newline-terminated JSON header. Binary frames in the response are taken out,
+    their total size goes in the header as binary_length, and their raw bytes follow the newline"""
+    frames = pop_binary_frames(response)
+    if frames is not None:
+        response["binary_length"] = sum(frame.nbytes for frame in frames)
+
+    # json.dumps escapes newlines inside strings, so the only raw newline is the terminator
+    response_json = json.dumps(response)
+    if frames is None:
+        print("Sending response: ", response_json)
+    else:
+        print(f"Sending binary response ({response['binary_length']} bytes)")
+    client.sendall(response_json.encode('utf-8') + b"\n")
+
+    for frame in frames or []:
+        view = memoryview(frame).cast('B')
+        for offset in range(0, len(view), chunk_size):
+            client.sendall(view[offset:offset + chunk_size])
+
+def get_process_peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    if sys.platform == "darwin":
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+def get_bounding_box(obj_eval):
+    corners = [obj_eval.matrix_world @ mathutils.Vector(corner) for corner in obj_eval.bound_box]
+    bb_min = [round(min(c[i] for c in corners), 4) for i in range(3)]
+    bb_max = [round(max(c[i] for c in corners), 4) for i in range(3)]
+    return {"min": bb_min, "max": bb_max}
+
+def count_instances(obj_eval, depsgraph):
+    geometry = obj_eval.evaluated_geometry() if hasattr(obj_eval, "evaluated_geometry") else None
+    if geometry is not None:
+        instances = geometry.instances_pointcloud()
+        return len(instances.points) if instances is not None else 0
+
+    # older Blender versions: walk the depsgraph instances spawned by this object
+    return sum(1 for inst in depsgraph.object_instances if inst.is_instance and inst.parent and inst.parent.original == obj_eval.original)
+
+def summarize_geometry(obj_eval, depsgraph):
+    mesh = obj_eval.data
+    summary = {
+        "vertices": len(mesh.vertices),
+        "edges": len(mesh.edges),
+        "faces": len(mesh.polygons),
+        "instances": count_instances(obj_eval, depsgraph),
+        "bounding_box": get_bounding_box(obj_eval),
+        "attributes": [{"name": a.name, "domain": a.domain, "type": a.data_type} for a in mesh.attributes if not a.name.startswith(".")],
+    }
+    return summary
+
+# commands that change the graph and would normally retrigger modifier evaluation
+graph_edit_commands = {"add_node", "set_node_values", "add_link", "set_output_node", "set_node_property"}
+
 # Blender UI Panel
 class BLENDERMCP_PT_Panel(bpy.types.Panel):
     bl_label = "Casey MCP"
@@ -602,7 +1657,7 @@ class BLENDERMCP_OT_Initialize(bpy.types.Operator):
         obj.select_set(True)
         context.view_layer.objects.active = obj
 
-        mod = obj.modifiers.new("Geo Node Modifier", type='NODES')
+        mod = obj.modifiers.new(MODIFIER_NAME, type='NODES')
         node_group = bpy.data.node_groups.new("mcp nodes", type='GeometryNodeTree')
         node_group.interface.new_socket(name="Geometry", in_out ="OUTPUT", socket_type="NodeSocketGeometry")
 
@@ -628,36 +1683,95 @@ class BLENDERMCP_OT_Initialize(bpy.types.Operator):
         global geo_node_group
         geo_node_group = node_group
 
+        warm_node_type_metadata()
+
         bpy.context.scene.render.resolution_x = 1080
         bpy.context.scene.render.resolution_y = 1080
 
         return {'FINISHED'}
 
-def get_extra_property_names(node):
-    obj_props = node.bl_rna.properties.keys()
-    base_props = node.bl_rna.base.properties.keys()
+# bl_idname -> RNA metadata, built once per node type per Blender session
+node_type_metadata = {}
 
-    non_inherited_props = [x for x in obj_props if x not in base_props]
-    return non_inherited_props
+def get_socket_signatures(sockets):
+    return [str(socket.name) + ": " + type(socket).__name__.replace("NodeSocket", "") for socket in sockets]
 
-def get_extra_properties(node):
-    non_inherited_props = get_extra_property_names(node)
+def build_node_type_metadata(node):
+    base_props = set(node.bl_rna.base.properties.keys())
+    property_names = [x for x in node.bl_rna.properties.keys() if x not in base_props]
 
-    extraProperties = []
-    for prop in non_inherited_props:
-        description = node.bl_rna.properties[prop].description
-        prop_type = node.bl_rna.properties[prop].type
+    properties = []
+    for prop in property_names:
+        rna_prop = node.bl_rna.properties[prop]
+        description = rna_prop.description
+        prop_type = rna_prop.type
         if prop_type == "ENUM":
-            values = node.bl_rna.properties[prop].enum_items
-            property = {"name": prop, "description": description, "type": prop_type, "values": [x.identifier for x in values]}
+            property = {"name": prop, "description": description, "type": prop_type, "values": [x.identifier for x in rna_prop.enum_items]}
         else:
             property = {"name": prop, "description": description, "type": prop_type}
-        
+
         if description == "":
             del property["description"]
 
-        extraProperties.append(property)
-    return extraProperties
+        properties.append(property)
+
+    return {
+        "property_names": property_names,
+        "property_name_set": frozenset(property_names),
+        "properties": properties,
+        "inputs": get_socket_signatures(node.inputs),
+        "outputs": get_socket_signatures(node.outputs),
+        "description": node.bl_description,
+    }
+
+def get_node_type_metadata(node):
+    metadata = node_type_metadata.get(node.bl_idname)
+    if metadata is None:
+        metadata = build_node_type_metadata(node)
+        node_type_metadata[node.bl_idname] = metadata
+    return metadata
+
+@contextmanager
+def scratch_node_group():
+    """Temporary geometry node tree for throwaway nodes. Adding nodes to the live tree would tag
+    the modifier for re-evaluation"""
+    node_group = bpy.data.node_groups.new("mcp_scratch", 'GeometryNodeTree')
+    try:
+        yield node_group
+    finally:
+        bpy.data.node_groups.remove(node_group)
+
+def get_node_type_metadata_by_type(node_type, node_group=None):
+    """Look up metadata for a node type, creating a throwaway node in a scratch tree on a cache miss"""
+    if node_type in node_type_metadata:
+        return node_type_metadata[node_type]
+
+    if node_group is None:
+        with scratch_node_group() as scratch:
+            return get_node_type_metadata_by_type(node_type, scratch)
+
+    node = node_group.nodes.new(node_type)
+    try:
+        return get_node_type_metadata(node)
+    finally:
+        node_group.nodes.remove(node)
+
+def warm_node_type_metadata():
+    with scratch_node_group() as scratch:
+        for node_type in node_types:
+            try:
+                get_node_type_metadata_by_type(node_type, scratch)
+            except Exception as e: # not every listed type exists in every Blender version
+                print(f"Could not cache metadata for {node_type}: {str(e)}")
+
+def serialize_node_type_metadata(metadata):
+    return {key: value for key, value in metadata.items() if key != "property_name_set"}
+
+def get_extra_property_names(node):
+    return get_node_type_metadata(node)["property_names"]
+
+def get_extra_properties(node):
+    return get_node_type_metadata(node)["properties"]
 
 def print_node_data(node):
     nodeData = {}
@@ -665,7 +1779,7 @@ def print_node_data(node):
     nodeData["outputs"] = [] 
 
     extraProperties = get_extra_properties(node)
-    nodeData["properties"] = extraProperties
+    nodeData["properties"] = list(extraProperties)
 
     for i in range(len(node.inputs)):
         name = str(node.inputs[i].name) + ": " + type(node.inputs[i]).__name__.replace("NodeSocket", "")
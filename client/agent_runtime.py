@@ -0,0 +1,391 @@
+import asyncio
+import json
+import os
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+from mcp import ClientSession, StdioServerParameters, types
+from mcp.client.stdio import stdio_client
+
+from history import HistoryManager
+
+load_dotenv()  # load API keys from .env
+
+SYSTEM_PROMPT = (
+    "You are a blender geometry-nodes artist agent. "
+    "Work with the tools provided to manipulate the geometry-nodes graph "
+    "into the requested 3-D model. Add as many nodes as necessary. "
+    "While iterating, render or inspect nodes to check if you're on the right track. "
+    "When finished, or if you encounter a persistent error, call end_loop."
+)
+
+# tools that don't change the graph, so calls to them from one model turn can run concurrently.
+# any other tool is a barrier: it runs alone, after everything requested before it.
+read_only_tools = frozenset({
+    "list_node_types", "get_node_type_info", "get_node_state", "get_current_graph", "test_blender_connection",
+    "inspect_node_output", "profile_graph", "read_attributes", "get_render_cache_stats", "render_node_output",
+    "compare_node_render", "measure_render_tiers", "render_nodes_background", "get_render_result",
+    "evaluate_node_outputs", "render_views", "get_graph_spec", "get_vision_stats",
+})
+
+# tools for whoever drives the agent (batch runs reset the graph with them), not offered to the model
+internal_tools = frozenset({"load_graph_spec"})
+
+max_parallel_tools = int(os.getenv("AGENT_MAX_PARALLEL_TOOLS", "4"))
+
+
+@dataclass
+class ToolCall:
+    id: str
+    name: str
+    arguments: Dict[str, Any]
+
+
+@dataclass
+class ModelTurn:
+    """A provider-neutral model response"""
+    text: List[str]
+    tool_calls: List[ToolCall]
+    assistant_message: Dict[str, Any]  # the response as a history entry in the provider's format
+    usage: Dict[str, int] = field(default_factory=dict)  # input_tokens, output_tokens, cached_tokens
+
+
+@dataclass
+class ToolResult:
+    call: ToolCall
+    text: str
+    images: List[Any] = field(default_factory=list)  # MCP ImageContent, already base64
+    is_error: bool = False
+    elapsed_ms: float = 0.0
+
+
+class AnthropicAdapter:
+    """Anthropic Messages API, called through the async client"""
+
+    def __init__(self, model: str = "claude-3-7-sonnet-20250219", max_tokens: int = 1000):
+        from anthropic import AsyncAnthropic
+
+        self.client = AsyncAnthropic()
+        self.model = model
+        self.max_tokens = max_tokens
+
+    def tool_schemas(self, tools) -> List[Dict[str, Any]]:
+        schemas = [{"name": tool.name, "description": tool.description, "input_schema": tool.inputSchema} for tool in tools]
+        if schemas:
+            # cache breakpoint after the last tool: the whole tool list is served from the prompt cache
+            schemas[-1]["cache_control"] = {"type": "ephemeral"}
+        return schemas
+
+    def system(self, system_prompt: str):
+        # tools come before the system prompt, so this breakpoint caches both
+        return [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+
+    async def complete(self, system, messages: List[Dict], tools: List[Dict], on_tool_call=None) -> ModelTurn:
+        """Stream a response. on_tool_call gets each tool call as soon as its input block is closed"""
+        async with self.client.messages.stream(
+            model=self.model,
+            max_tokens=self.max_tokens,
+            system=system,
+            messages=messages,
+            tools=tools,
+        ) as stream:
+            async for event in stream:
+                if on_tool_call and event.type == "content_block_stop" and event.content_block.type == "tool_use":
+                    block = event.content_block
+                    on_tool_call(ToolCall(block.id, block.name, block.input))
+            response = await stream.get_final_message()
+
+        text = [c.text for c in response.content if c.type == "text"]
+        calls = [ToolCall(c.id, c.name, c.input) for c in response.content if c.type == "tool_use"]
+        assistant_message = {"role": "assistant", "content": [c.model_dump(exclude_none=True) for c in response.content]}
+        usage = {
+            "input_tokens": response.usage.input_tokens,
+            "output_tokens": response.usage.output_tokens,
+            "cached_tokens": response.usage.cache_read_input_tokens or 0,
+        }
+        return ModelTurn(text, calls, assistant_message, usage)
+
+    def user_message(self, text: str, cache: bool = False) -> Dict[str, Any]:
+        if cache:
+            return {"role": "user", "content": [{"type": "text", "text": text, "cache_control": {"type": "ephemeral"}}]}
+        return {"role": "user", "content": text}
+
+    def tool_result_messages(self, results: List[ToolResult]) -> List[Dict[str, Any]]:
+        # every tool_use block of one assistant message is answered in a single user message
+        content = []
+        for result in results:
+            blocks = [{"type": "text", "text": result.text}] if result.text else []
+            blocks += [{"type": "image", "source": {"type": "base64", "media_type": image.mimeType, "data": image.data}}
+                       for image in result.images]
+            content.append({"type": "tool_result", "tool_use_id": result.call.id, "content": blocks, "is_error": result.is_error})
+        return [{"role": "user", "content": content}]
+
+
+class OpenAIAdapter:
+    """OpenAI Chat Completions, called through the async client"""
+
+    def __init__(self, model: str = "gpt-4o", max_tokens: int = 1000):
+        from openai import AsyncOpenAI
+
+        self.client = AsyncOpenAI()  # uses environment vars for auth
+        self.model = model
+        self.max_tokens = max_tokens
+
+    def tool_schemas(self, tools) -> List[Dict[str, Any]]:
+        # OpenAI caches repeated prompt prefixes on its own, it only needs the tools to stay identical between turns
+        return [{
+            "type": "function",
+            "function": {"name": tool.name, "description": tool.description, "parameters": tool.inputSchema},
+        } for tool in tools]
+
+    def system(self, system_prompt: str):
+        return {"role": "system", "content": system_prompt}
+
+    async def complete(self, system, messages: List[Dict], tools: List[Dict], on_tool_call=None) -> ModelTurn:
+        """Stream a response. on_tool_call gets each tool call as soon as its arguments are complete,
+        which is when the next call starts streaming or the response ends"""
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[system, *messages],
+            tools=tools,
+            tool_choice="auto",
+            max_tokens=self.max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+
+        content = []
+        streamed_calls = {}  # index -> {"id", "name", "arguments"}
+        calls = []
+        usage = {}
+
+        def finish_calls():
+            for index in sorted(streamed_calls)[len(calls):]:
+                streamed = streamed_calls[index]
+                call = ToolCall(streamed["id"], streamed["name"], json.loads(streamed["arguments"] or "{}"))
+                calls.append(call)
+                if on_tool_call:
+                    on_tool_call(call)
+
+        async for chunk in stream:
+            if chunk.usage:
+                details = chunk.usage.prompt_tokens_details
+                usage = {
+                    "input_tokens": chunk.usage.prompt_tokens,
+                    "output_tokens": chunk.usage.completion_tokens,
+                    "cached_tokens": (details.cached_tokens or 0) if details else 0,
+                }
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                content.append(delta.content)
+            for call_delta in delta.tool_calls or []:
+                if call_delta.index not in streamed_calls:
+                    finish_calls()
+                    streamed_calls[call_delta.index] = {"id": "", "name": "", "arguments": ""}
+                streamed = streamed_calls[call_delta.index]
+                streamed["id"] = call_delta.id or streamed["id"]
+                if call_delta.function:
+                    streamed["name"] += call_delta.function.name or ""
+                    streamed["arguments"] += call_delta.function.arguments or ""
+        finish_calls()
+
+        text = "".join(content)
+        assistant_message = {"role": "assistant", "content": text or None}
+        if calls:
+            assistant_message["tool_calls"] = [{
+                "id": streamed["id"],
+                "type": "function",
+                "function": {"name": streamed["name"], "arguments": streamed["arguments"]},
+            } for _, streamed in sorted(streamed_calls.items())]
+        return ModelTurn([text] if text else [], calls, assistant_message, usage)
+
+    def user_message(self, text: str, cache: bool = False) -> Dict[str, Any]:
+        return {"role": "user", "content": text}
+
+    def tool_result_messages(self, results: List[ToolResult]) -> List[Dict[str, Any]]:
+        messages = []
+        images = []
+        for result in results:
+            text = result.text
+            if result.images:
+                text += "\nvisual output included in next user message."
+                images += [(result.call.name, image) for image in result.images]
+            messages.append({"role": "tool", "tool_call_id": result.call.id, "content": text})
+
+        # tool messages can't carry images, and must directly follow the assistant message
+        if images:
+            content = []
+            for tool_name, image in images:
+                content.append({"type": "text", "text": f"{tool_name} output"})
+                content.append({"type": "image_url", "image_url": {"url": f"data:{image.mimeType};base64,{image.data}"}})
+            messages.append({"role": "user", "content": content})
+        return messages
+
+
+class ToolDispatcher:
+    """Starts tool calls as they arrive. Read-only calls run concurrently with each other, a graph edit
+    waits for every earlier call and every later call waits for it. Results keep the arrival order."""
+
+    def __init__(self, runtime):
+        self.runtime = runtime
+        self.tasks = []
+        self.barrier = None
+
+    def dispatch(self, call: ToolCall):
+        read_only = call.name in read_only_tools
+        if read_only:
+            wait_for = [self.barrier] if self.barrier else []
+        else:
+            wait_for = list(self.tasks)
+
+        async def run():
+            if wait_for:
+                await asyncio.wait(wait_for)
+            return await self.runtime.call_tool(call)
+
+        task = asyncio.create_task(run())
+        if not read_only:
+            self.barrier = task
+        self.tasks.append(task)
+
+    async def results(self) -> List[ToolResult]:
+        return list(await asyncio.gather(*self.tasks))
+
+    def cancel(self):
+        for task in self.tasks:
+            task.cancel()
+
+
+class AgentRuntime:
+    """Agent loop over an MCP server, shared by all model providers"""
+
+    def __init__(self, adapter, system_prompt: str = SYSTEM_PROMPT, tool_timeout: float = 10.0, max_parallel: int = max_parallel_tools):
+        self.adapter = adapter
+        self.system_prompt = system_prompt
+        self.tool_timeout = tool_timeout
+        self.tool_semaphore = asyncio.Semaphore(max_parallel)
+        self.system = adapter.system(system_prompt)
+        self.tools: Optional[List[Dict]] = None  # provider tool schemas, until the server says the tool list changed
+        self.exit_stack = AsyncExitStack()
+        self.session: Optional[ClientSession] = None
+        self.history = HistoryManager(adapter)
+
+    async def connect_to_server(self, server_script_path: str, env: Dict[str, str] = None):
+        """Start the MCP server script and open a session on its stdio"""
+        if not server_script_path.endswith((".py", ".js")):
+            raise ValueError("Server script must be a .py or .js file")
+
+        command = "python" if server_script_path.endswith(".py") else "node"
+        server_params = StdioServerParameters(command=command, args=[server_script_path], env=env)
+
+        stdio, write = await self.exit_stack.enter_async_context(stdio_client(server_params))
+        self.session = await self.exit_stack.enter_async_context(ClientSession(stdio, write, message_handler=self.handle_message))
+        await self.session.initialize()
+
+        tools = (await self.session.list_tools()).tools
+        self.tools = self.adapter.tool_schemas([tool for tool in tools if tool.name not in internal_tools])
+        print("\nConnected to server with tools:", [tool.name for tool in tools])
+
+    async def handle_message(self, message):
+        if isinstance(message, types.ServerNotification) and isinstance(message.root, types.ToolListChangedNotification):
+            self.tools = None
+
+    async def cleanup(self):
+        await self.exit_stack.aclose()
+
+    async def get_tools(self) -> List[Dict]:
+        if self.tools is None:
+            tools = (await self.session.list_tools()).tools
+            self.tools = self.adapter.tool_schemas([tool for tool in tools if tool.name not in internal_tools])
+        return self.tools
+
+    async def call_tool(self, call: ToolCall) -> ToolResult:
+        start = time.perf_counter()
+        try:
+            async with self.tool_semaphore:
+                result = await asyncio.wait_for(self.session.call_tool(call.name, call.arguments), timeout=self.tool_timeout)
+        except asyncio.TimeoutError:
+            return ToolResult(call, f"tool call failed: timeout after {self.tool_timeout} seconds", is_error=True)
+        except Exception as e:
+            return ToolResult(call, f"tool call failed: {str(e)}", is_error=True)
+
+        text = "\n".join(c.text for c in result.content if c.type == "text")
+        images = [c for c in result.content if c.type == "image"]
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        return ToolResult(call, text, images, is_error=bool(getattr(result, "isError", False)), elapsed_ms=elapsed_ms)
+
+    async def process_turn(self) -> Dict[str, Any]:
+        """Stream one model response, running each tool call as soon as it has streamed in,
+        and add everything to the history"""
+        dispatcher = ToolDispatcher(self)
+
+        def on_tool_call(call):
+            if call.name != "end_loop":
+                dispatcher.dispatch(call)
+
+        try:
+            turn = await self.adapter.complete(self.system, self.history.messages(), await self.get_tools(), on_tool_call)
+        except BaseException:
+            dispatcher.cancel()
+            raise
+        final_text = list(turn.text)
+        done = {"new_text": "\n".join(final_text), "is_done": True, "usage": turn.usage, "tool_calls": []}
+
+        self.history.add_turn(turn)
+        if not turn.tool_calls:
+            # a reply without tool calls is an answer or a question for the user, the query is over either way.
+            # asking the model again would send a history that ends on its own message
+            return done
+
+        start = time.perf_counter()
+        results = {result.call.id: result for result in await dispatcher.results()}
+        # end_loop isn't sent to the server, but its tool call still needs a result in the history
+        results = [results.get(call.id) or ToolResult(call, "loop ended") for call in turn.tool_calls]
+        saved = self.history.stats["tokens_saved"]
+        self.history.add_results(results)
+        for result in results:
+            final_text.append(f"[Called tool {result.call.name} with args {result.call.arguments} in {result.elapsed_ms:.0f}ms]")
+            final_text.append(f"[{result.call.name} output] {result.text}" + (f" (+{len(result.images)} image(s))" if result.images else ""))
+        if len(results) > 1:
+            final_text.append(f"[{len(results)} tool calls finished {(time.perf_counter() - start) * 1000:.0f}ms after the response ended]")
+
+        if self.history.stats["tokens_saved"] > saved:
+            final_text.append(f"[history compacted, ~{self.history.estimate_tokens()} tokens, {self.history.stats}]")
+
+        tool_calls = [{"name": result.call.name, "arguments": result.call.arguments, "elapsed_ms": round(result.elapsed_ms, 1), "is_error": result.is_error}
+                      for result in results]
+        ended = any(call.name == "end_loop" for call in turn.tool_calls)
+        return {"new_text": "\n".join(final_text), "is_done": ended, "usage": turn.usage, "tool_calls": tool_calls}
+
+    async def start_session(self):
+        """Reset the history and seed it with the available node types"""
+        self.history = HistoryManager(self.adapter)
+        node_types = await self.session.call_tool("list_node_types", {})
+        # the node type list never changes within a session, so it's marked as a prompt cache prefix
+        self.history.add_user(f"Available node types: {node_types.content[0].text}", cache=True)
+
+    async def run_query(self, query: str, on_turn=print):
+        self.history.add_user(query)
+        finished = False
+        while not finished:
+            turn = await self.process_turn()
+            on_turn("\n" + turn["new_text"])
+            finished = turn["is_done"]
+
+    async def agent_loop(self):
+        """Interactive terminal loop"""
+        print("\nMCP Client started. Type your queries or 'quit' to exit.")
+        await self.start_session()
+
+        while True:
+            query = (await asyncio.to_thread(input, "\nQuery: ")).strip()
+            if query.lower() == "quit":
+                break
+            await self.run_query(query)
+
+        print("Good-bye!")
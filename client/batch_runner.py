@@ -0,0 +1,197 @@
+# Headless batch runs of the agent. Run with:
+#   python batch_runner.py prompts.jsonl results.jsonl --server ../server.py --provider anthropic --pairs 2
+# Each prompt line is {"id": ..., "prompt": ...}. Every pair is one headless Blender (render_worker.py)
+# and one MCP server connected to it, and the pairs work through the prompts concurrently.
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+
+from agent_runtime import AgentRuntime, AnthropicAdapter, OpenAIAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from render_pool import RenderWorker
+
+adapters = {"anthropic": AnthropicAdapter, "openai": OpenAIAdapter}
+image_extensions = {"image/png": "png", "image/jpeg": "jpg", "image/webp": "webp"}
+
+
+def load_prompts(path: str):
+    prompts = []
+    with open(path) as f:
+        for i, line in enumerate(f):
+            if line.strip():
+                record = json.loads(line)
+                prompts.append({"id": record.get("id", i), "prompt": record["prompt"]})
+    return prompts
+
+
+async def call_command(session, tool: str, arguments=None):
+    """Call a tool that forwards a Blender command and return the command's result, raising on errors"""
+    result = await session.call_tool(tool, arguments or {})
+    text = "\n".join(c.text for c in result.content if c.type == "text")
+    try:
+        response = json.loads(text)
+    except json.JSONDecodeError:
+        raise Exception(text)
+    if response.get("status") != "success":
+        raise Exception(f"{tool} failed: {response.get('message', text)}")
+    return response.get("result")
+
+
+def output_source_node(spec):
+    """Id of the node feeding the group output, which is what the finished model looks like"""
+    output_ids = {node["id"] for node in spec["nodes"] if node["type"] == "NodeGroupOutput"}
+    return next((link["from_node"] for link in spec["links"] if link["to_node"] in output_ids), None)
+
+
+class AgentPair:
+    """A headless Blender and an MCP server talking to it, running one prompt at a time"""
+
+    def __init__(self, index: int, args):
+        self.index = index
+        self.args = args
+        self.port = args.base_port + index
+        self.blender = RenderWorker(args.blender_path, self.port, connection_factory=None)
+        self.runtime = None
+        self.initial_spec = None
+
+    async def start(self):
+        await asyncio.to_thread(self.blender.launch)
+
+        env = {
+            **os.environ,
+            "BLENDER_PORT": str(self.port),
+            # each server gets its own single background render worker
+            "BLENDER_RENDER_WORKERS": "1",
+            "BLENDER_RENDER_WORKER_PORT": str(self.args.render_worker_port + self.index),
+        }
+        adapter_class = adapters[self.args.provider]
+        self.runtime = AgentRuntime(adapter_class(self.args.model) if self.args.model else adapter_class())
+        await self.runtime.connect_to_server(self.args.server, env=env)
+
+        # every prompt starts from the graph a fresh Blender has
+        self.initial_spec = await call_command(self.runtime.session, "get_graph_spec")
+
+    async def stop(self):
+        if self.runtime:
+            await self.runtime.cleanup()
+        await asyncio.to_thread(self.blender.stop)
+
+    async def run(self, prompt):
+        record = {"id": prompt["id"], "prompt": prompt["prompt"], "pair": self.index, "status": "max_turns", "turns": 0,
+                  "tool_calls": [], "usage": {"input_tokens": 0, "output_tokens": 0, "cached_tokens": 0}}
+        start = time.perf_counter()
+        try:
+            await call_command(self.runtime.session, "load_graph_spec", {"spec": self.initial_spec})
+            await self.runtime.start_session()
+            self.runtime.history.add_user(prompt["prompt"])
+
+            while record["turns"] < self.args.max_turns:
+                turn = await self.runtime.process_turn()
+                record["turns"] += 1
+                record["tool_calls"] += turn["tool_calls"]
+                for key, value in turn["usage"].items():
+                    record["usage"][key] = record["usage"].get(key, 0) + value
+                if self.args.verbose:
+                    print(f"[pair {self.index}, prompt {prompt['id']}] {turn['new_text']}")
+                if turn["is_done"]:
+                    record["status"] = "done"
+                    break
+
+            record["latency_s"] = round(time.perf_counter() - start, 2)
+            record["graph_spec"] = await call_command(self.runtime.session, "get_graph_spec")
+            record["final_render"] = await self.save_render(prompt["id"], record["graph_spec"])
+        except Exception as e:
+            record["status"] = "error"
+            record["error"] = str(e)
+            record["latency_s"] = round(time.perf_counter() - start, 2)
+        record["history_stats"] = self.runtime.history.stats
+        return record
+
+    async def save_render(self, prompt_id, spec):
+        node_id = output_source_node(spec)
+        if node_id is None:
+            return None
+
+        result = await self.runtime.session.call_tool("render_node_output", {"node_id": node_id, "quality": self.args.render_quality})
+        image = next((c for c in result.content if c.type == "image"), None)
+        if image is None:
+            return None
+
+        path = os.path.join(self.args.render_dir, f"{prompt_id}.{image_extensions.get(image.mimeType, 'png')}")
+        with open(path, "wb") as f:
+            f.write(base64.b64decode(image.data))
+        return path
+
+
+async def pair_worker(index, args, prompts: asyncio.Queue, results_file):
+    """Start a pair and run prompts from the queue on it until the queue is empty.
+    The MCP session is opened and closed in this one task, which its transport requires."""
+    pair = AgentPair(index, args)
+    records = []
+    try:
+        await pair.start()
+        while not prompts.empty():
+            record = await pair.run(prompts.get_nowait())
+            results_file.write(json.dumps(record) + "\n")
+            results_file.flush()
+            records.append(record)
+            print(f"[pair {index}] prompt {record['id']}: {record['status']} after {record['turns']} turns in {record['latency_s']}s")
+    finally:
+        await pair.stop()
+    return records
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Run a JSONL file of prompts against a pool of Blender and MCP server pairs")
+    parser.add_argument("prompts", help="JSONL file with one {\"id\", \"prompt\"} object per line")
+    parser.add_argument("results", help="JSONL file to write one result per prompt to")
+    parser.add_argument("--server", default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "server.py"))
+    parser.add_argument("--provider", choices=list(adapters.keys()), default="anthropic")
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--pairs", type=int, default=int(os.getenv("BATCH_PAIRS", "2")))
+    parser.add_argument("--max-turns", type=int, default=30)
+    parser.add_argument("--blender-path", default=os.getenv("BLENDER_PATH", "blender"))
+    parser.add_argument("--base-port", type=int, default=9800)
+    parser.add_argument("--render-worker-port", type=int, default=9950)
+    parser.add_argument("--render-quality", default="preview")
+    parser.add_argument("--render-dir", default="batch_renders")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    os.makedirs(args.render_dir, exist_ok=True)
+    prompts = asyncio.Queue()
+    for prompt in load_prompts(args.prompts):
+        prompts.put_nowait(prompt)
+    total = prompts.qsize()
+
+    start = time.perf_counter()
+    with open(args.results, "w") as results_file:
+        pair_results = await asyncio.gather(*[pair_worker(i, args, prompts, results_file) for i in range(min(args.pairs, total))],
+                                            return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    records = []
+    for i, pair_result in enumerate(pair_results):
+        if isinstance(pair_result, BaseException):
+            print(f"[pair {i}] failed: {str(pair_result)}")
+        else:
+            records += pair_result
+
+    done = [r for r in records if r["status"] == "done"]
+    print(f"\n{len(records)}/{total} prompts ran, {len(done)} finished, in {elapsed:.1f}s "
+          f"({len(records) / elapsed * 60:.1f} prompts/min)")
+    if records:
+        latencies = sorted(r["latency_s"] for r in records)
+        print(f"latency: median {latencies[len(latencies) // 2]}s, max {latencies[-1]}s")
+        for key in ("input_tokens", "output_tokens", "cached_tokens"):
+            print(f"{key}: {sum(r['usage'].get(key, 0) for r in records)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+import json
+import os
+from typing import Any, Dict, List
+
+token_budget = int(os.getenv("AGENT_TOKEN_BUDGET", "60000"))
+max_result_chars = int(os.getenv("AGENT_MAX_RESULT_CHARS", "6000"))
+image_tokens = 1600  # rough cost of one 512px image for either provider
+
+# tools whose result is a snapshot of graph state. once the same snapshot is taken again the older one is stale
+snapshot_tools = {
+    "get_current_graph": lambda args: "graph",
+    "get_node_state": lambda args: f"node {args.get('node_id')}",
+    "get_graph_spec": lambda args: "graph spec",
+}
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // 4
+
+
+class HistoryManager:
+    """Agent message history, kept provider-neutral and rendered to provider messages every turn.
+
+    Keeps the history short: superseded graph snapshots are replaced by a stub, large tool results are
+    truncated, and once the estimate exceeds the token budget the oldest tool results lose their images
+    and then their text.
+    """
+
+    def __init__(self, adapter, budget: int = token_budget, max_chars: int = max_result_chars):
+        self.adapter = adapter
+        self.budget = budget
+        self.max_chars = max_chars
+        self.entries = []  # ("user", text, cache) | ("assistant", ModelTurn) | ("results", [ToolResult])
+        self.snapshots = {}
+        self.stats = {"superseded": 0, "truncated": 0, "images_dropped": 0, "elided": 0, "tokens_saved": 0}
+
+    def add_user(self, text: str, cache: bool = False):
+        self.entries.append(("user", text, cache))
+
+    def add_turn(self, turn):
+        self.entries.append(("assistant", turn))
+
+    def add_results(self, results):
+        for result in results:
+            self.truncate(result)
+            self.supersede(result)
+        self.entries.append(("results", results))
+        self.enforce_budget()
+
+    def messages(self) -> List[Dict[str, Any]]:
+        messages = []
+        for entry in self.entries:
+            if entry[0] == "user":
+                messages.append(self.adapter.user_message(entry[1], cache=entry[2]))
+            elif entry[0] == "assistant":
+                messages.append(entry[1].assistant_message)
+            else:
+                messages.extend(self.adapter.tool_result_messages(entry[1]))
+        return messages
+
+    def replace(self, result, text: str):
+        saved = self.result_tokens(result) - estimate_tokens(text)
+        result.text = text
+        result.images = []
+        self.stats["tokens_saved"] += max(saved, 0)
+
+    def truncate(self, result):
+        if len(result.text) <= self.max_chars:
+            return
+        head, tail = self.max_chars * 3 // 4, self.max_chars // 4
+        dropped = len(result.text) - head - tail
+        result.text = f"{result.text[:head]}\n[... {dropped} characters truncated ...]\n{result.text[-tail:]}"
+        self.stats["truncated"] += 1
+        self.stats["tokens_saved"] += dropped // 4
+
+    def supersede(self, result):
+        if result.is_error or result.call.name not in snapshot_tools:
+            return
+        key = snapshot_tools[result.call.name](result.call.arguments)
+        previous = self.snapshots.get(key)
+        if previous is not None:
+            self.replace(previous, f"[superseded by a later {result.call.name} result]")
+            self.stats["superseded"] += 1
+        self.snapshots[key] = result
+
+    def result_tokens(self, result) -> int:
+        return estimate_tokens(result.text) + image_tokens * len(result.images)
+
+    def entry_tokens(self, entry) -> int:
+        if entry[0] == "user":
+            return estimate_tokens(entry[1])
+        if entry[0] == "assistant":
+            return estimate_tokens(json.dumps(entry[1].assistant_message, default=str))
+        return sum(self.result_tokens(result) for result in entry[1])
+
+    def estimate_tokens(self) -> int:
+        return sum(self.entry_tokens(entry) for entry in self.entries)
+
+    def enforce_budget(self):
+        """Compact the oldest tool results until the history fits the budget. The latest results are left alone."""
+        total = self.estimate_tokens()
+        if total <= self.budget:
+            return
+
+        older = [result for entry in self.entries[:-1] if entry[0] == "results" for result in entry[1]]
+        for result in older:
+            if total <= self.budget:
+                return
+            if result.images:
+                before = self.result_tokens(result)
+                self.stats["images_dropped"] += len(result.images)
+                self.stats["tokens_saved"] += image_tokens * len(result.images)
+                result.images = []
+                total -= before - self.result_tokens(result)
+
+        for result in older:
+            if total <= self.budget:
+                return
+            stub = f"[{result.call.name} result elided to fit the context budget]"
+            if len(result.text) > len(stub):
+                before = self.result_tokens(result)
+                self.replace(result, stub)
+                self.stats["elided"] += 1
+                total -= before - self.result_tokens(result)
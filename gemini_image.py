@@ -1,13 +1,34 @@
-from google.genai import types
-from google import genai
-from dotenv import load_dotenv
+# Vision model evaluation of renders. The provider comes from vision_backends (VISION_BACKEND),
+# so importing this module does not load any vision SDK or need an API key.
+from response_cache import ResponseCache
+from vision_backends import get_backend
+import asyncio
+import hashlib
+import json
+import random
 import os
 
-load_dotenv()
+max_concurrency = int(os.getenv("VISION_MAX_CONCURRENCY", os.getenv("GEMINI_MAX_CONCURRENCY", "4")))
+max_retries = 3
+retry_base_delay = 0.5
 
-api_key = os.getenv("GEMINI_API_KEY")
+_semaphore = None
 
-client = genai.Client(api_key=api_key)
+_response_cache = None
+
+def get_response_cache():
+    global _response_cache
+    if _response_cache is None:
+        _response_cache = ResponseCache()
+    return _response_cache
+
+def get_model_key():
+    backend = get_backend()
+    return f"{backend.name}:{backend.model}"
+
+def preprocess(image_bytes: bytes):
+    from image_preprocess import preprocess_image
+    return preprocess_image(image_bytes)
 
 def evaluate_prompt(expected_output_description: str):
     return f"""You are a 3D agent working with blender geometry nodes. Attached is the output of a specific node in the graph. We expect the output of this node to look like the following: {expected_output_description}.
@@ -15,21 +36,110 @@ def evaluate_prompt(expected_output_description: str):
     Please describe in detail whether or not the image matches the description, and if not, what specific aspects are different.
     """
 
+def evaluate_images_prompt(expected_output_descriptions):
+    expectations = "\n".join(f"Image {i + 1}: {description}" for i, description in enumerate(expected_output_descriptions))
+    return f"""You are a 3D agent working with blender geometry nodes. Attached are {len(expected_output_descriptions)} images, each the output of a different node in the graph, labelled in order. We expect them to look like the following:
+{expectations}
+
+    For each image, describe in detail whether or not it matches its description, and if not, what specific aspects are different.
+    Respond with a JSON array containing one object per image, in order: {{"image": <image number>, "matches": <true or false>, "details": <your description>}}
+    """
+
 def describe_prompt():
     return "You are a 3D agent working with blender geometry nodes. Attached is the output of a specific node in the graph. Please describe in detail what the visible geometry looks like. Only discuss the geometry, not the environment, lighting, or shading."
 
-def get_response(image_bytes: bytes, prompt: str):
-    response = client.models.generate_content(
-        model='gemini-2.0-flash',
-        contents=[
-        types.Part.from_bytes(
-            data=image_bytes,
-            mime_type='image/png',
-        ),
-        prompt
-        ]   
-    )
-    return response.text
+def get_response(image_bytes: bytes, prompt: str, mime_type: str = 'image/png'):
+    """Blocking get_response_async, for scripts"""
+    return asyncio.run(get_response_async(image_bytes, prompt, mime_type))
+
+def get_semaphore():
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(max_concurrency)
+    return _semaphore
+
+async def get_response_async(image_bytes: bytes, prompt: str, mime_type: str = 'image/png', deadline: float = 60.0):
+    response_cache = get_response_cache()
+    cache_key = response_cache.make_key(image_bytes, get_model_key(), prompt)
+    cached = await asyncio.to_thread(response_cache.get, cache_key)
+    if cached is not None:
+        return cached
+
+    image_bytes, mime_type, stats = await asyncio.to_thread(preprocess, image_bytes)
+    print(f"Preprocessed image: {stats}")
+
+    contents = [(image_bytes, mime_type), prompt]
+    return await generate_async(contents, cache_key, deadline)
+
+async def generate_async(contents, cache_key: str, deadline: float = 60.0, json_response: bool = False):
+    """Send a request, limited to max_concurrency requests in flight, and cache its response.
+    Retries transient errors with exponential backoff until the deadline (seconds) runs out.
+    Cancelling the calling task cancels the request."""
+    backend = get_backend()
+    loop = asyncio.get_running_loop()
+    end = loop.time() + deadline
+
+    async with get_semaphore():
+        for attempt in range(max_retries + 1):
+            remaining = end - loop.time()
+            if remaining <= 0:
+                raise TimeoutError(f"{backend.name} request exceeded its {deadline}s deadline")
+            try:
+                async with asyncio.timeout(remaining):
+                    text = await backend.generate(contents, json_response)
+                await asyncio.to_thread(get_response_cache().put, cache_key, text)
+                return text
+            except Exception as e:
+                if attempt == max_retries or not backend.is_retryable(e) or loop.time() >= end:
+                    raise
+                delay = min(retry_base_delay * 2 ** attempt + random.uniform(0, retry_base_delay), max(end - loop.time(), 0))
+                print(f"{backend.name} request failed ({str(e)}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+async def evaluate_image_bytes_async(image_bytes: bytes, expected_output_description: str, mime_type: str = 'image/png'):
+    return await get_response_async(image_bytes, evaluate_prompt(expected_output_description), mime_type)
+
+async def evaluate_images_async(images, deadline: float = 120.0):
+    """Evaluate several images against their own expectations in a single request.
+
+    Parameters:
+    - images: list of (image bytes, mime type, expected output description)
+
+    Returns:
+    - one {"image", "matches", "details"} dict per image, in order
+    """
+    prompt = evaluate_images_prompt([expected for _, _, expected in images])
+    image_hashes = b"".join(hashlib.sha256(image_bytes).digest() for image_bytes, _, _ in images)
+    cache_key = get_response_cache().make_key(image_hashes, get_model_key(), prompt)
+
+    text = await asyncio.to_thread(get_response_cache().get, cache_key)
+    if text is None:
+        contents = []
+        for i, (image_bytes, mime_type, _) in enumerate(images):
+            image_bytes, mime_type, stats = await asyncio.to_thread(preprocess, image_bytes)
+            print(f"Preprocessed image {i + 1}: {stats}")
+            contents += [f"Image {i + 1}:", (image_bytes, mime_type)]
+        contents.append(prompt)
+
+        text = await generate_async(contents, cache_key, deadline, json_response=True)
+
+    return parse_image_verdicts(text, len(images))
+
+def parse_image_verdicts(text: str, image_count: int):
+    """Split a batched evaluation response into per-image verdicts, falling back to the raw text"""
+    try:
+        verdicts = {int(v["image"]): v for v in json.loads(text)}
+    except (json.JSONDecodeError, TypeError, KeyError, ValueError):
+        verdicts = {}
+
+    return [verdicts.get(i + 1, {"image": i + 1, "matches": None, "details": text}) for i in range(image_count)]
+
+def evaluate_images(images):
+    """Blocking evaluate_images_async, for scripts"""
+    return asyncio.run(evaluate_images_async(images))
+
+async def describe_image_bytes_async(image_bytes: bytes, mime_type: str = 'image/png'):
+    return await get_response_async(image_bytes, describe_prompt(), mime_type)
 
 def evaluate_image(img_path: str, expected_output_description: str):
     print("Evaluating image: ", img_path)
@@ -54,18 +164,4 @@ def describe_image(img_path: str):
 if __name__ == "__main__":
     expected_output_description = "a smooth sphere"
 
-    with open('viewport_render.png', 'rb') as f:
-        image_bytes = f.read()
-
-    response = client.models.generate_content(
-        model='gemini-2.0-flash',
-        contents=[
-        types.Part.from_bytes(
-            data=image_bytes,
-            mime_type='image/png',
-        ),
-        evaluate_prompt(expected_output_description)
-        ]   
-    )
-
-    print(response.text)
\ No newline at end of file
+    print(evaluate_image('viewport_render.png', expected_output_description))
\ No newline at end of file
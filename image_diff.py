@@ -0,0 +1,74 @@
+import io
+
+import numpy as np
+from PIL import Image
+
+compare_size = 256
+max_hash_distance = 2
+# a pixel has changed when its local SSIM drops below 1 - change_threshold. 0.05 is above JPEG
+# re-encoding and antialiasing noise (< 0.035) and below a flat 80 -> 120 shade change (~0.077)
+change_threshold = 0.05
+# changed when more than this fraction of pixels changed: about 33 pixels at 256px, so a
+# 10px object in a 512px render still counts
+max_changed_fraction = 0.0005
+
+
+def load_gray(image_bytes: bytes, size: int = compare_size) -> np.ndarray:
+    image = Image.open(io.BytesIO(image_bytes)).convert("L").resize((size, size), Image.BILINEAR)
+    return np.asarray(image, dtype=np.float64)
+
+
+def dhash(gray: np.ndarray, hash_size: int = 8) -> int:
+    """Difference hash: one bit per horizontally adjacent pixel pair of a (hash_size+1) x hash_size thumbnail"""
+    small = np.asarray(Image.fromarray(gray.astype(np.uint8)).resize((hash_size + 1, hash_size), Image.BILINEAR), dtype=np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int(np.packbits(bits).tobytes().hex(), 16)
+
+
+def box_filter(image: np.ndarray, radius: int) -> np.ndarray:
+    """Mean over a (2r+1)^2 window using an integral image, same output size with edge padding"""
+    padded = np.pad(image, radius + 1, mode="edge")
+    integral = padded.cumsum(axis=0).cumsum(axis=1)
+    w = 2 * radius + 1
+    total = integral[w:, w:] - integral[:-w, w:] - integral[w:, :-w] + integral[:-w, :-w]
+    return total[:image.shape[0], :image.shape[1]] / (w * w)
+
+
+def ssim(a: np.ndarray, b: np.ndarray, radius: int = 3):
+    """Structural similarity with a box window. Returns (mean SSIM, per-pixel SSIM map)"""
+    c1, c2 = (0.01 * 255) ** 2, (0.03 * 255) ** 2
+    mu_a, mu_b = box_filter(a, radius), box_filter(b, radius)
+    var_a = box_filter(a * a, radius) - mu_a ** 2
+    var_b = box_filter(b * b, radius) - mu_b ** 2
+    covariance = box_filter(a * b, radius) - mu_a * mu_b
+    ssim_map = ((2 * mu_a * mu_b + c1) * (2 * covariance + c2)) / ((mu_a ** 2 + mu_b ** 2 + c1) * (var_a + var_b + c2))
+    return float(ssim_map.mean()), ssim_map
+
+
+def diff_heatmap(previous: np.ndarray, current: np.ndarray, ssim_map: np.ndarray) -> bytes:
+    """PNG of the current render in gray with changed regions highlighted in red"""
+    change = np.clip(1 - ssim_map, 0, 1)
+    change = change / max(change.max(), 1e-6)
+    base = current * 0.5 + 64
+    heatmap = np.stack([base + change * (255 - base), base * (1 - change), base * (1 - change)], axis=2)
+    output = io.BytesIO()
+    Image.fromarray(np.clip(heatmap, 0, 255).astype(np.uint8)).save(output, format="PNG")
+    return output.getvalue()
+
+
+def compare_images(previous_bytes: bytes, current_bytes: bytes):
+    """Compare two renders without a vision model.
+
+    Returns:
+    - (result with hash distance, SSIM and a "changed" verdict, heatmap PNG bytes)
+    """
+    previous, current = load_gray(previous_bytes), load_gray(current_bytes)
+    hash_distance = bin(dhash(previous) ^ dhash(current)).count("1")
+    similarity, ssim_map = ssim(previous, current)
+
+    # the mean SSIM hides small local changes, so the verdict looks at how much of the image changed
+    changed_fraction = float(((1 - ssim_map) > change_threshold).mean())
+    changed = hash_distance > max_hash_distance or changed_fraction > max_changed_fraction
+    result = {"changed": changed, "hash_distance": hash_distance, "ssim": round(similarity, 4),
+              "min_ssim": round(float(ssim_map.min()), 4), "changed_fraction": round(changed_fraction, 5)}
+    return result, diff_heatmap(previous, current, ssim_map)
@@ -0,0 +1,86 @@
+import io
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+target_size = int(os.getenv("VLM_IMAGE_SIZE", "512"))
+target_format = os.getenv("VLM_IMAGE_FORMAT", "JPEG")
+target_quality = int(os.getenv("VLM_IMAGE_QUALITY", "80"))
+
+mime_types = {"JPEG": "image/jpeg", "WEBP": "image/webp", "PNG": "image/png"}
+
+# running totals over all preprocessed images
+totals = {"images": 0, "bytes_before": 0, "bytes_after": 0, "encode_ms": 0.0}
+
+
+def crop_to_content(pixels: np.ndarray, tile_size: int = None, background=(255, 255, 255), tolerance: int = 8,
+                    margin: float = 0.05) -> np.ndarray:
+    """Crop an HxWxC image to the pixels that differ from the background (renders are cleared to white).
+    For a contact sheet, pass its tile_size: the separator lines drawn along the tile edges are not content."""
+    rgb = pixels[..., :3].astype(np.int16)
+    mask = np.any(np.abs(rgb - np.array(background, dtype=np.int16)) > tolerance, axis=2)
+
+    if tile_size:
+        # separators sit on the first row and column of each tile. the pixel either side is left out
+        # as well, since encoding smears the line into its neighbours
+        height, width = mask.shape
+        row_lines = np.isin(np.arange(height) % tile_size, (0, 1, tile_size - 1))
+        column_lines = np.isin(np.arange(width) % tile_size, (0, 1, tile_size - 1))
+        mask &= ~row_lines[:, None] & ~column_lines[None, :]
+
+    rows = np.flatnonzero(mask.any(axis=1))
+    columns = np.flatnonzero(mask.any(axis=0))
+    if len(rows) == 0:
+        return pixels
+
+    height, width = mask.shape
+    pad = int(max(rows[-1] - rows[0], columns[-1] - columns[0]) * margin)
+    top, bottom = max(rows[0] - pad, 0), min(rows[-1] + pad + 1, height)
+    left, right = max(columns[0] - pad, 0), min(columns[-1] + pad + 1, width)
+    return pixels[top:bottom, left:right]
+
+
+def preprocess_image(image_bytes: bytes, size: int = None, image_format: str = None, quality: int = None,
+                     tile_size: int = None):
+    """Crop a render to its geometry, downsample it and re-encode it for upload.
+    The original bytes are kept when they are already in the target format and size, or when
+    re-encoding would not make them smaller.
+
+    Parameters:
+    - tile_size: Tile size of a contact sheet, so its separator lines aren't taken for geometry
+
+    Returns:
+    - (encoded bytes, mime type, stats with before/after bytes and encode time)
+    """
+    size = size or target_size
+    image_format = (image_format or target_format).upper()
+    quality = quality or target_quality
+
+    start = time.perf_counter()
+    original = Image.open(io.BytesIO(image_bytes))
+    original_format, original_size = original.format, original.size
+    pixels = crop_to_content(np.asarray(original.convert("RGB")), tile_size)
+
+    image = Image.fromarray(pixels)
+    image.thumbnail((size, size), Image.LANCZOS)
+
+    if original_format == image_format and image.size == original_size:
+        # nothing was cropped or scaled, and another lossy pass would only degrade it
+        encoded, mime_type, reencoded = image_bytes, mime_types[image_format], False
+    else:
+        output = io.BytesIO()
+        image.save(output, format=image_format, quality=quality)
+        encoded, mime_type, reencoded = output.getvalue(), mime_types[image_format], True
+        if len(encoded) >= len(image_bytes) and original_format in mime_types:
+            encoded, mime_type, reencoded = image_bytes, mime_types[original_format], False
+    encode_ms = (time.perf_counter() - start) * 1000
+
+    stats = {"bytes_before": len(image_bytes), "bytes_after": len(encoded), "reencoded": reencoded,
+             "size": list(image.size if reencoded else original_size), "encode_ms": round(encode_ms, 2)}
+    totals["images"] += 1
+    totals["bytes_before"] += len(image_bytes)
+    totals["bytes_after"] += len(encoded)
+    totals["encode_ms"] += encode_ms
+    return encoded, mime_type, stats
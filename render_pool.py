@@ -0,0 +1,143 @@
+import os
+import queue
+import socket
+import subprocess
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+worker_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "render_worker.py")
+
+
+class RenderWorker:
+    """One `blender -b` process running render_worker.py, and a connection to it"""
+
+    def __init__(self, blender_path: str, port: int, connection_factory: Callable[[int], Any]):
+        self.blender_path = blender_path
+        self.port = port
+        self.connection_factory = connection_factory
+        self.process = None
+        self.connection = None
+
+    def start(self, startup_timeout: float = 60.0):
+        self.launch(startup_timeout)
+        self.connection = self.connection_factory(self.port)
+        if not self.connection.connect():
+            self.stop()
+            raise Exception(f"Could not connect to render worker on port {self.port}")
+
+    def launch(self, startup_timeout: float = 60.0):
+        """Start the Blender process and wait until it accepts connections, without connecting"""
+        self.process = subprocess.Popen(
+            [self.blender_path, "-b", "--factory-startup", "--python", worker_script, "--", "--port", str(self.port)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+
+        deadline = time.monotonic() + startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise Exception(f"Render worker on port {self.port} exited with code {self.process.returncode}")
+            try:
+                with socket.create_connection(("localhost", self.port), timeout=1.0):
+                    pass
+                break
+            except OSError:
+                time.sleep(0.25)
+        else:
+            self.stop()
+            raise Exception(f"Render worker on port {self.port} did not start within {startup_timeout} seconds")
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def stop(self):
+        if self.connection:
+            self.connection.disconnect()
+            self.connection = None
+        if self.is_alive():
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+    def render(self, params: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, bytes]]:
+        result, frames = self.connection.send_command_binary("render_spec", params)
+        return result, {name: bytes(frame) for name, frame in frames.items()}
+
+
+class RenderWorkerPool:
+    """Pool of headless Blender render workers, started lazily on first use.
+
+    Renders are independent of the interactive Blender instance: callers pass a graph spec from
+    get_graph_spec, and each worker rebuilds the graph and renders it on its own core.
+    """
+
+    def __init__(self, connection_factory: Callable[[int], Any], size: int = None, blender_path: str = None, base_port: int = None):
+        self.connection_factory = connection_factory
+        self.size = size or int(os.getenv("BLENDER_RENDER_WORKERS", "2"))
+        self.blender_path = blender_path or os.getenv("BLENDER_PATH", "blender")
+        self.base_port = base_port or int(os.getenv("BLENDER_RENDER_WORKER_PORT", "9900"))
+        self.workers: List[RenderWorker] = []
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+
+    def start(self):
+        with self.lock:
+            if self.workers:
+                return
+            for i in range(self.size):
+                worker = RenderWorker(self.blender_path, self.base_port + i, self.connection_factory)
+                worker.start()
+                self.workers.append(worker)
+                self.idle.put(worker)
+            print(f"Started {self.size} render workers")
+
+    def stop(self):
+        with self.lock:
+            for worker in self.workers:
+                worker.stop()
+            self.workers = []
+            self.idle = queue.Queue()
+
+    def render(self, spec: Dict[str, Any], node_id: int, tier: str = "preview", views: List[str] = None, tile_size: int = 512):
+        """Render one node of a graph spec on the next free worker. Blocks until a worker is available"""
+        params = {"spec": spec, "node_id": node_id, "tier": tier, "views": views, "tile_size": tile_size}
+
+        worker = self.acquire()
+        try:
+            if not worker.is_alive():
+                print(f"Render worker on port {worker.port} died, restarting")
+                worker.stop()
+                worker.start()
+            return worker.render(params)
+        except Exception:
+            # don't hand a connection in an unknown state to the next job
+            worker.stop()
+            try:
+                worker.start()
+            except Exception as restart_error:
+                print(f"Could not restart render worker on port {worker.port}: {str(restart_error)}")
+            raise
+        finally:
+            self.release(worker)
+
+    def acquire(self) -> RenderWorker:
+        """Wait for an idle worker, starting the pool again if every worker has been retired"""
+        while True:
+            self.start()
+            try:
+                return self.idle.get(timeout=1.0)
+            except queue.Empty:
+                continue
+
+    def release(self, worker: RenderWorker):
+        if worker.is_alive():
+            self.idle.put(worker)
+            return
+        # a worker that couldn't be restarted is retired instead of being handed to the next job
+        with self.lock:
+            if worker in self.workers:
+                self.workers.remove(worker)
@@ -0,0 +1,91 @@
+# Headless render worker. Run with:
+#   blender -b --factory-startup --python render_worker.py -- --port 9900
+# Receives a graph spec and a node id, rebuilds the graph and returns the rendered image.
+
+import bpy
+import json
+import os
+import socket
+import sys
+import traceback
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import addon
+
+
+def parse_port():
+    args = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    if "--port" in args:
+        return int(args[args.index("--port") + 1])
+    return 9900
+
+
+def receive_command(client):
+    buffer = b''
+    while True:
+        data = client.recv(65536)
+        if not data:
+            return None
+        buffer += data
+        try:
+            return json.loads(buffer.decode('utf-8'))
+        except json.JSONDecodeError:
+            continue
+
+
+def render_spec(server, spec, node_id, tier="preview", views=None, tile_size=512):
+    """Load a graph spec and render one node. Returns a command response"""
+    loaded = server.execute_command({"type": "load_graph_spec", "params": {"spec": spec}})
+    if loaded["status"] != "success" or loaded["result"]["status"] != "success":
+        return loaded
+
+    if views is not None:
+        return server.execute_command({"type": "render_views", "params": {"node_id": node_id, "views": views, "tile_size": tile_size, "tier": tier}})
+    return server.execute_command({"type": "render_node_image", "params": {"node_id": node_id, "tier": tier}})
+
+
+def handle_client(server, client):
+    while True:
+        command = receive_command(client)
+        if command is None:
+            return
+
+        try:
+            if command.get("type") == "render_spec":
+                response = render_spec(server, **command.get("params", {}))
+            else:
+                response = server.execute_command(command)
+        except Exception as e:
+            traceback.print_exc()
+            response = {"status": "error", "message": str(e)}
+
+        addon.send_response(client, response)
+
+
+def main():
+    addon.register()
+    bpy.ops.blendermcp.initialize()
+
+    # commands run directly on this process's main thread, so no socket server thread or timers are needed
+    server = addon.BlenderMCPServer()
+    server.run_jobs_inline = True
+    port = parse_port()
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(("localhost", port))
+    listener.listen(1)
+    print(f"Render worker listening on port {port}")
+
+    while True:
+        client, address = listener.accept()
+        try:
+            handle_client(server, client)
+        except Exception as e:
+            print(f"Render worker client error: {str(e)}")
+        finally:
+            client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import atexit
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    """Persistent cache of vision model responses keyed by image content, model and prompt.
+
+    Entries expire after ttl seconds, and the least recently used ones are evicted beyond max_entries.
+    """
+
+    def __init__(self, path: str = None, max_entries: int = None, ttl: float = None):
+        self.path = path or os.getenv("VLM_CACHE_PATH", ".vlm_cache.sqlite3")
+        self.max_entries = max_entries or int(os.getenv("VLM_CACHE_MAX_ENTRIES", "1000"))
+        self.ttl = ttl or float(os.getenv("VLM_CACHE_TTL", str(7 * 24 * 3600)))
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, response TEXT, created REAL, last_used REAL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self.db.commit()
+        # last_used times of hits, written with the next put instead of a commit per hit
+        self.touched = {}
+        atexit.register(self.flush)
+
+    @staticmethod
+    def make_key(image_bytes: bytes, model: str, prompt: str) -> str:
+        key = hashlib.sha256()
+        key.update(hashlib.sha256(image_bytes).digest())
+        key.update(model.encode('utf-8') + b"\0" + prompt.encode('utf-8'))
+        return key.hexdigest()
+
+    def get(self, key: str):
+        now = time.time()
+        with self.lock:
+            row = self.db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                self.misses += 1
+                return None
+            self.touched[key] = now
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str):
+        now = time.time()
+        with self.lock:
+            self.write_touched()
+            self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, response, now, now))
+            self.db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            self.db.execute(
+                "DELETE FROM responses WHERE key NOT IN (SELECT key FROM responses ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+            self.db.commit()
+
+    def write_touched(self):
+        if self.touched:
+            self.db.executemany("UPDATE responses SET last_used = ? WHERE key = ?", [(t, k) for k, t in self.touched.items()])
+            self.touched = {}
+
+    def flush(self):
+        with self.lock:
+            self.write_touched()
+            self.db.commit()
+
+    def stats(self):
+        with self.lock:
+            entries = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
@@ -1,28 +1,54 @@
 from typing import Any
 import httpx
-from mcp.server.fastmcp import FastMCP, Context
-from dataclasses import dataclass
+from mcp.server.fastmcp import FastMCP, Context, Image
+from dataclasses import dataclass, field
 from contextlib import asynccontextmanager
 import socket
 import json
 import asyncio
 import logging
 from typing import AsyncIterator, Dict, Any, List, Annotated
-from gemini_image import describe_image, evaluate_image
+from gemini_image import evaluate_images_async, get_response_cache
+import image_preprocess
+from render_pool import RenderWorkerPool
+from image_diff import compare_images
 import os
+import threading
+import numpy
 
 mcp = FastMCP("weather")
 
 data_filepath = "node_data.json"
+img_filepath = os.path.abspath("./viewport_render.png")
 
 # Global connection for resources (since resources can't access context)
 _blender_connection = None
+_blender_connection_lock = threading.Lock()
+
+# Headless Blender processes for rendering off the interactive instance's main thread
+# load + evaluate + render of a heavy graph takes far longer than an interactive command
+render_worker_timeout = float(os.getenv("BLENDER_RENDER_WORKER_TIMEOUT", "600"))
+render_pool = RenderWorkerPool(connection_factory=lambda port: BlenderConnection(host="localhost", port=port, timeout=render_worker_timeout))
+
+# node id -> bytes of its last render, for change detection between renders
+_previous_renders = {}
+
+# (node id, expected description) -> (render bytes, verdict) of the last vision model evaluation
+_previous_verdicts = {}
+
+# Node type metadata served by the addon, cached for the lifetime of the Blender connection
+_node_type_metadata = {}
 
 @dataclass
 class BlenderConnection:
     host: str
     port: int
     sock: socket.socket = None  # Changed from 'socket' to 'sock' to avoid naming conflict
+    last_payload: bytearray = None  # raw frames of the last binary response
+    timeout: float = 15.0  # seconds to wait for a response, matches the addon's timeout
+    # held for each whole command round trip: tools run concurrently, some of them in threads,
+    # and two commands in flight on one socket would read each other's replies
+    lock: threading.RLock = field(default_factory=threading.RLock)
     
     def connect(self) -> bool:
         """Connect to the Blender addon socket server"""
@@ -50,63 +76,64 @@ class BlenderConnection:
                 self.sock = None
 
     def receive_full_response(self, sock, buffer_size=8192):
-        """Receive the complete response, potentially in multiple chunks"""
-        chunks = []
-        # Use a consistent timeout value that matches the addon's timeout
-        sock.settimeout(15.0)  # Match the addon's timeout
-        
-        try:
-            while True:
-                try:
-                    chunk = sock.recv(buffer_size)
-                    if not chunk:
-                        # If we get an empty chunk, the connection might be closed
-                        if not chunks:  # If we haven't received anything yet, this is an error
-                            raise Exception("Connection closed before receiving any data")
-                        break
-                    
-                    chunks.append(chunk)
-                    
-                    # Check if we've received a complete JSON object
-                    try:
-                        data = b''.join(chunks)
-                        json.loads(data.decode('utf-8'))
-                        # If we get here, it parsed successfully
-                        print(f"Received complete response ({len(data)} bytes)")
-                        return data
-                    except json.JSONDecodeError:
-                        # Incomplete JSON, continue receiving
-                        continue
-                except socket.timeout:
-                    # If we hit a timeout during receiving, break the loop and try to use what we have
-                    print("Socket timeout during chunked receive")
-                    break
-                except (ConnectionError, BrokenPipeError, ConnectionResetError) as e:
-                    print(f"Socket connection error during receive: {str(e)}")
-                    raise  # Re-raise to be handled by the caller
-        except socket.timeout:
-            print("Socket timeout during chunked receive")
-        except Exception as e:
-            print(f"Error during receive: {str(e)}")
-            raise
-            
-        # If we get here, we either timed out or broke out of the loop
-        # Try to use what we have
-        if chunks:
-            data = b''.join(chunks)
-            print(f"Returning data after receive completion ({len(data)} bytes)")
-            try:
-                # Try to parse what we have
-                json.loads(data.decode('utf-8'))
-                return data
-            except json.JSONDecodeError:
-                # If we can't parse it, it's incomplete
-                raise Exception("Incomplete JSON response received")
-        else:
-            raise Exception("No data received")
+        """Receive one response: a newline-terminated JSON header, followed by binary_length bytes of
+        frames when the header declares them. Returns the header bytes, the frames go to self.last_payload"""
+        sock.settimeout(self.timeout)
+
+        data = b''
+        while b"\n" not in data:
+            chunk = sock.recv(buffer_size)
+            if not chunk:
+                raise ConnectionError("Connection closed before a complete response was received")
+            data += chunk
+
+        header_end = data.index(b"\n")
+        header = data[:header_end]
+        print(f"Received response header ({len(header)} bytes)")
+
+        binary_length = json.loads(header.decode('utf-8')).get("binary_length", 0)
+        if binary_length:
+            self.receive_binary_payload(sock, data[header_end + 1:], binary_length)
+        return header
+
+    def receive_binary_payload(self, sock, received: bytes, binary_length: int, buffer_size=1024 * 1024):
+        """Receive the frames following a header into one preallocated buffer, kept as self.last_payload"""
+        payload = bytearray(binary_length)
+        view = memoryview(payload)
+        view[:len(received)] = received
+        offset = len(received)
+        while offset < binary_length:
+            n = sock.recv_into(view[offset:], min(buffer_size, binary_length - offset))
+            if n == 0:
+                raise ConnectionError("Connection closed during binary response")
+            offset += n
+
+        print(f"Received binary response ({binary_length} bytes)")
+        self.last_payload = payload
+
+    def send_command_binary(self, command_type: str, params: Dict[str, Any] = None):
+        """Send a command whose response carries binary frames. Returns (result, {frame name: memoryview})"""
+        with self.lock:
+            self.last_payload = None
+            result = self.send_command(command_type, params)
+            payload = self.last_payload
+        if payload is None or result.get("status") != "success":
+            return result, {}
+
+        frames = {}
+        view = memoryview(payload)
+        offset = 0
+        for frame in result["result"]["frames"]:
+            frames[frame["name"]] = view[offset:offset + frame["nbytes"]]
+            offset += frame["nbytes"]
+        return result, frames
 
     def send_command(self, command_type: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
         """Send a command to Blender and return the response"""
+        with self.lock:
+            return self.send_command_locked(command_type, params)
+
+    def send_command_locked(self, command_type: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
         if not self.sock and not self.connect():
             raise ConnectionError("Not connected to Blender")
         
@@ -124,7 +151,7 @@ class BlenderConnection:
             print(f"Command sent, waiting for response...")
             
             # Set a timeout for receiving - use the same timeout as in receive_full_response
-            self.sock.settimeout(15.0)  # Match the addon's timeout
+            self.sock.settimeout(self.timeout)
             
             # Receive the response using the improved receive_full_response method
             response_data = self.receive_full_response(self.sock)
@@ -140,9 +167,9 @@ class BlenderConnection:
             return response.get("result", {})
         except socket.timeout:
             print("Socket timeout while waiting for response from Blender")
-            # Don't try to reconnect here - let the get_blender_connection handle reconnection
-            # Just invalidate the current socket so it will be recreated next time
-            self.sock = None
+            # Close the socket so a late response can't be read as the reply to the next command.
+            # get_blender_connection will reconnect
+            self.disconnect()
             raise Exception("Timeout waiting for Blender response - try simplifying your request")
         except (ConnectionError, BrokenPipeError, ConnectionResetError) as e:
             print(f"Socket connection error: {str(e)}")
@@ -188,10 +215,16 @@ async def server_lifespan(server: FastMCP) -> AsyncIterator[Dict[str, Any]]:
             print("Disconnecting from Blender on shutdown")
             _blender_connection.disconnect()
             _blender_connection = None
+        render_pool.stop()
         print("BlenderMCP server shut down")
 
 def get_blender_connection():
     """Get or create a persistent Blender connection"""
+    # tools call this from worker threads too, and only one of them may replace a dead connection
+    with _blender_connection_lock:
+        return get_blender_connection_locked()
+
+def get_blender_connection_locked():
     global _blender_connection
     
     # If we have an existing connection, check if it's still valid
@@ -209,7 +242,8 @@ def get_blender_connection():
     
     if _blender_connection is None:
         print("Creating new connection to Blender")
-        _blender_connection = BlenderConnection(host="localhost", port=9876)
+        _node_type_metadata.clear()
+        _blender_connection = BlenderConnection(host="localhost", port=int(os.getenv("BLENDER_PORT", "9876")))
         if not _blender_connection.connect():
             print("Failed to connect to Blender")
             _blender_connection = None
@@ -227,6 +261,11 @@ def send_blender_command(command: str, params: Dict[str, Any] = None):
     except Exception as e:
         return f"Error with command {command}: {str(e)}"
 
+def send_blender_command_binary(command: str, params: Dict[str, Any] = None):
+    """Look up the connection and send a binary command from the calling thread. Async tools run this
+    with asyncio.to_thread: the lookup pings Blender, and the connection's lock may be held by a render"""
+    return get_blender_connection().send_command_binary(command, params)
+
 
 @mcp.tool()
 def list_node_types(ctx: Context) -> str:
@@ -247,8 +286,30 @@ def get_node_type_info(ctx: Context, node_type: str) -> str:
     if(node_data is None):
         load_node_data()
 
+    metadata = get_node_type_metadata(node_type)
+    if metadata is not None:
+        return json.dumps(metadata)
+
     return json.dumps(node_data[node_type])
 
+def get_node_type_metadata(node_type: str):
+    """Get RNA metadata for a node type from Blender, fetching it at most once per Blender session"""
+    if node_type in _node_type_metadata:
+        return _node_type_metadata[node_type]
+
+    try:
+        blender = get_blender_connection()
+        result = blender.send_command("get_node_type_info", {"node_type": node_type})
+    except Exception as e:
+        print(f"Could not get metadata for {node_type} from Blender: {str(e)}")
+        return None
+
+    if result.get("status") != "success":
+        return None
+
+    _node_type_metadata[node_type] = result["result"]
+    return _node_type_metadata[node_type]
+
 @mcp.tool()
 def add_node(ctx: Context, node_type: str, inputValues: Dict[str, Any] = {}) -> str:
     """Add a node to the geometry nodes graph
@@ -311,6 +372,21 @@ def set_output_node(ctx: Context, node_id: int) -> str:
     """
     return send_blender_command("set_output_node", {"node_id": node_id})
 
+@mcp.tool()
+def begin_construction(ctx: Context) -> str:
+    """Defer graph evaluation while building. Call this before adding many nodes or links,
+    then call commit_construction once the graph is wired up. Rendering commits automatically."""
+    return send_blender_command("begin_construction")
+
+@mcp.tool()
+def commit_construction(ctx: Context) -> str:
+    """Evaluate the graph once after construction mode
+
+    Returns:
+    - The number of evaluations avoided and the time taken by the final evaluation
+    """
+    return send_blender_command("commit_construction")
+
 @mcp.tool()
 def end_loop(ctx: Context) -> str:
     """End the loop"""
@@ -341,18 +417,355 @@ def set_node_property(ctx: Context, node_id: int, name: Annotated[str, "non-inpu
 #     return result
 
 @mcp.tool()
-def render_node_output(ctx: Context, node_id: int) -> str:
-    blender_out = send_blender_command("visually_evaluate_node", {"node_id": node_id})
-    # return "got blender out: " + blender_out
+def inspect_node_output(ctx: Context, node_id: int) -> str:
+    """Summarize a node's evaluated geometry without rendering it. Prefer this to render_node_output
+    for checking counts, size and attributes.
+    Parameters:
+    - node_id: The id of the node to inspect
+
+    Returns:
+    - Vertex, edge, face and instance counts, world-space bounding box, attributes with their domains, and evaluation time
+    """
+    return send_blender_command("inspect_node_output", {"node_id": node_id})
+
+@mcp.tool()
+def profile_graph(ctx: Context) -> str:
+    """Time the evaluation of the geometry nodes graph to find slow nodes
 
-    blender_out = json.loads(blender_out)
+    Returns:
+    - Geometry nodes sorted by their own evaluation time, total modifier evaluation time and the Blender process's lifetime peak RSS (not this graph's cost)
+    """
+    return send_blender_command("profile_graph")
 
-    if not blender_out["status"] == "success":
-        return blender_out
-    
-    filepath = blender_out["message"]
-    # return "got filepath: " + filepath
-    return filepath
+@mcp.tool()
+def read_attributes(ctx: Context, node_id: int, names: List[str] = None, start: int = 0, count: int = None, stride: int = 1, output_dir: str = None) -> str:
+    """Read evaluated per-element attribute data of a node's output
+    Parameters:
+    - node_id: The id of the node to read
+    - names: Attribute names to read, defaults to ["position", "normal"]
+    - start, count: Element range to read, for paging through large meshes
+    - stride: Keep every nth element
+    - output_dir: If given, each attribute is written there as a raw .bin file
+
+    Returns:
+    - dtype, shape and per-component min/max for each attribute, plus file paths if output_dir was given
+    """
+    try:
+        blender = get_blender_connection()
+        result, frames = blender.send_command_binary("read_attributes", {"node_id": node_id, "names": names, "start": start, "count": count, "stride": stride})
+    except Exception as e:
+        return f"Error with command read_attributes: {str(e)}"
+
+    if result.get("status") != "success":
+        return json.dumps(result)
+
+    headers = result["result"]["frames"]
+    for header in headers:
+        frame = frames[header["name"]]
+        header.update(summarize_frame(frame, header))
+        if output_dir is not None:
+            path = os.path.join(output_dir, f"node_{node_id}_{header['name']}.bin")
+            with open(path, "wb") as f:
+                f.write(frame)
+            header["path"] = path
+
+    return json.dumps(result["result"])
+
+# filepath -> content hash of the last export written there
+_export_hashes = {}
+
+@mcp.tool()
+def export_node_output(ctx: Context, node_id: int, filepath: str) -> str:
+    """Export a node's evaluated mesh to a binary PLY file
+    Parameters:
+    - node_id: The id of the node to export
+    - filepath: Where to write the .ply file. Unchanged geometry is not re-exported.
+    """
+    filepath = os.path.abspath(filepath)
+    known_hash = _export_hashes.get(filepath) if os.path.exists(filepath) else None
+
+    try:
+        blender = get_blender_connection()
+        result, frames = blender.send_command_binary("export_node_output", {"node_id": node_id, "known_hash": known_hash})
+    except Exception as e:
+        return f"Error with command export_node_output: {str(e)}"
+
+    if result.get("status") != "success":
+        return json.dumps(result)
+
+    export = result["result"]
+    if not export["unchanged"]:
+        with open(filepath, "wb") as f:
+            for header in export.pop("frames"):
+                f.write(frames[header["name"]])
+        _export_hashes[filepath] = export["hash"]
+
+    export["filepath"] = filepath
+    return json.dumps(export)
+
+def summarize_frame(frame: memoryview, header: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-component min/max of a binary attribute frame"""
+    if header["nbytes"] == 0:
+        return {}
+
+    # one row per element, one column per component
+    values = numpy.frombuffer(frame, dtype=header["dtype"]).reshape(header["shape"][0], -1)
+    return {"min": values.min(axis=0).tolist(), "max": values.max(axis=0).tolist()}
+
+@mcp.tool()
+def get_render_cache_stats(ctx: Context) -> str:
+    """Get hit and miss counts of the render cache"""
+    return send_blender_command("get_render_cache_stats")
+
+@mcp.tool()
+def get_vision_stats(ctx: Context) -> str:
+    """Get vision model response cache hits and misses, and how much image preprocessing shrank uploads"""
+    totals = image_preprocess.totals
+    preprocess = {**totals, "encode_ms": round(totals["encode_ms"], 2)}
+    if totals["bytes_before"]:
+        preprocess["size_ratio"] = round(totals["bytes_after"] / totals["bytes_before"], 4)
+    return json.dumps({"response_cache": get_response_cache().stats(), "preprocess": preprocess})
+
+@mcp.tool()
+def render_node_output(ctx: Context, node_id: int, quality: Annotated[str, "thumbnail (256px JPEG), preview (512px JPEG) or final (full resolution PNG)"] = "preview") -> List[str | Image]:
+    """Render the output geometry of a node to an image
+    Parameters:
+    - node_id: The id of the node to render
+    - quality: Quality tier, use thumbnail or preview while iterating
+
+    Returns:
+    - Whether the render visibly changed since the node's previous render, and the rendered image
+    """
+    try:
+        blender = get_blender_connection()
+        result, frames = blender.send_command_binary("render_node_image", {"node_id": node_id, "tier": quality})
+    except Exception as e:
+        return [f"Error with command render_node_image: {str(e)}"]
+
+    if result.get("status") != "success":
+        return [json.dumps(result)]
+
+    image = bytes(frames["image"])
+    change = {"changed": True, "previous_render": False}
+    if node_id in _previous_renders:
+        change, heatmap = compare_images(_previous_renders[node_id], image)
+    _previous_renders[node_id] = image
+
+    return [json.dumps(change), image_from_frame(result["result"]["frames"][0], image)]
+
+@mcp.tool()
+def compare_node_render(ctx: Context, node_id: int, quality: str = "preview") -> List[str | Image]:
+    """Render a node and compare it to its previous render locally, without a vision model.
+    Use this to check whether an edit visibly changed a node's output.
+    Parameters:
+    - node_id: The id of the node to render
+    - quality: Quality tier of the render (thumbnail, preview or final)
+
+    Returns:
+    - Whether there is a visible change (with hash distance and SSIM), and a heatmap of the changed regions
+    """
+    try:
+        blender = get_blender_connection()
+        result, frames = blender.send_command_binary("render_node_image", {"node_id": node_id, "tier": quality})
+    except Exception as e:
+        return [f"Error with command render_node_image: {str(e)}"]
+
+    if result.get("status") != "success":
+        return [json.dumps(result)]
+
+    image = bytes(frames["image"])
+    previous = _previous_renders.get(node_id)
+    _previous_renders[node_id] = image
+    if previous is None:
+        return [json.dumps({"changed": True, "previous_render": False})]
+
+    change, heatmap = compare_images(previous, image)
+    return [json.dumps(change), Image(data=heatmap, format="png")]
+
+@mcp.tool()
+def measure_render_tiers(ctx: Context, node_id: int) -> str:
+    """Render a node at every quality tier and report render time and image size for each"""
+    return send_blender_command("measure_render_tiers", {"node_id": node_id})
+
+@mcp.tool()
+def get_graph_spec(ctx: Context) -> str:
+    """Get a serializable description of the whole graph, with node types, properties, input values and links"""
+    return send_blender_command("get_graph_spec")
+
+@mcp.tool()
+def load_graph_spec(ctx: Context, spec: Dict[str, Any]) -> str:
+    """Replace the whole graph with one described by get_graph_spec
+    Parameters:
+    - spec: A graph spec from get_graph_spec
+    """
+    # node ids are reused by the new graph, so earlier renders no longer describe them
+    _previous_renders.clear()
+    _previous_verdicts.clear()
+    return send_blender_command("load_graph_spec", {"spec": spec})
+
+@mcp.tool()
+async def render_nodes_background(ctx: Context, node_ids: List[int], quality: str = "preview") -> List[str | Image]:
+    """Render the output of several nodes in parallel on background Blender workers,
+    without blocking the interactive Blender instance
+    Parameters:
+    - node_ids: The ids of the nodes to render
+    - quality: Quality tier (thumbnail, preview or final)
+
+    Returns:
+    - A label followed by the rendered image for each node id
+    """
+    try:
+        spec_result = await asyncio.to_thread(lambda: get_blender_connection().send_command("get_graph_spec"))
+    except Exception as e:
+        return [f"Error with command get_graph_spec: {str(e)}"]
+    if spec_result.get("status") != "success":
+        return [json.dumps(spec_result)]
+    spec = spec_result["result"]
+
+    async def render_one(node_id):
+        try:
+            result, frames = await asyncio.to_thread(render_pool.render, spec, node_id, quality)
+        except Exception as e:
+            return [f"node {node_id}: error: {str(e)}"]
+        if result.get("status") != "success":
+            return [f"node {node_id}: error: {result.get('message')}"]
+        return [f"node {node_id}:", image_from_frame(result["result"]["frames"][0], frames["image"])]
+
+    rendered = await asyncio.gather(*[render_one(node_id) for node_id in node_ids])
+    return [content for node_content in rendered for content in node_content]
+
+@mcp.tool()
+def start_render(ctx: Context, node_id: int, quality: str = "preview", views: List[str] = None) -> str:
+    """Start rendering a node in the background. Use this instead of render_node_output for heavy graphs
+    Parameters:
+    - node_id: The id of the node to render
+    - quality: Quality tier (thumbnail, preview or final)
+    - views: Optional list of views (front, back, side, top, bottom, iso) to render as a grid
+
+    Returns:
+    - A job id to pass to get_render_result or cancel_render
+    """
+    return send_blender_command("start_render", {"node_id": node_id, "tier": quality, "views": views})
+
+@mcp.tool()
+async def get_render_result(ctx: Context, job_id: str, wait_seconds: float = 8.0) -> List[str | Image]:
+    """Wait for a render job started with start_render
+    Parameters:
+    - job_id: The id returned by start_render
+    - wait_seconds: How long to wait for the job to finish before returning its progress
+
+    Returns:
+    - The job status, and the image once the job is done
+    """
+    deadline = asyncio.get_running_loop().time() + wait_seconds
+    while True:
+        # each poll is a short command, so a slow render can never time out the connection
+        try:
+            result, frames = await asyncio.to_thread(send_blender_command_binary, "get_render_job", {"job_id": job_id})
+        except Exception as e:
+            return [f"Error with command get_render_job: {str(e)}"]
+
+        if result.get("status") != "success":
+            return [json.dumps(result)]
+
+        job = result["result"]
+        if job["status"] == "done":
+            header = job.pop("frames")[0]
+            return [json.dumps(job), image_from_frame(header, frames["image"])]
+        if job["status"] in ("error", "cancelled") or asyncio.get_running_loop().time() >= deadline:
+            return [json.dumps(job)]
+
+        await asyncio.sleep(0.25)
+
+@mcp.tool()
+def cancel_render(ctx: Context, job_id: str) -> str:
+    """Cancel a render job started with start_render"""
+    return send_blender_command("cancel_render", {"job_id": job_id})
+
+@mcp.tool()
+async def evaluate_node_outputs(ctx: Context, checks: List[Dict[str, Any]], quality: str = "preview", batch_size: int = 6) -> str:
+    """Render several nodes and have a vision model compare each render to its expected appearance.
+    Renders are sent to the model together, several per request.
+    Parameters:
+    - checks: List of {"node_id": int, "expected_output_description": str}
+    - quality: Quality tier of the renders (thumbnail, preview or final)
+    - batch_size: Maximum number of images per vision model request
+
+    Returns:
+    - The vision model's verdict for each node
+    """
+    async def render(node_id):
+        return await asyncio.to_thread(send_blender_command_binary, "render_node_image", {"node_id": node_id, "tier": quality})
+
+    # renders share the single Blender connection, so they go one at a time
+    results = [None] * len(checks)
+    pending = []
+    for i, check in enumerate(checks):
+        try:
+            result, frames = await render(check["node_id"])
+        except Exception as e:
+            result, frames = {"status": "error", "message": str(e)}, {}
+        if result.get("status") != "success":
+            results[i] = {"node_id": check["node_id"], "error": result.get("message")}
+            continue
+
+        image = bytes(frames["image"])
+        key = (check["node_id"], check["expected_output_description"])
+
+        # skip the vision model when the render looks the same as the one it last judged
+        if key in _previous_verdicts:
+            previous_image, previous_verdict = _previous_verdicts[key]
+            change, heatmap = await asyncio.to_thread(compare_images, previous_image, image)
+            if not change["changed"]:
+                results[i] = {"node_id": check["node_id"], "verdict": previous_verdict, "no_visible_change": True, "change": change}
+                continue
+
+        pending.append((i, key, image, result["result"]["frames"][0]["mime_type"]))
+
+    async def evaluate_batch(batch):
+        try:
+            # single images go through the batch prompt too, so every verdict is an {image, matches, details} dict
+            verdicts = await evaluate_images_async([(image, mime_type, key[1]) for i, key, image, mime_type in batch])
+        except Exception as e:
+            for i, key, image, mime_type in batch:
+                results[i] = {"node_id": key[0], "error": str(e)}
+            return
+
+        for (i, key, image, mime_type), verdict in zip(batch, verdicts):
+            _previous_verdicts[key] = (image, verdict)
+            results[i] = {"node_id": key[0], "verdict": verdict}
+
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), max(batch_size, 1))]
+    await asyncio.gather(*[evaluate_batch(batch) for batch in batches])
+    return json.dumps(results)
+
+def image_from_frame(header: Dict[str, Any], image: memoryview) -> Image:
+    """Wrap a rendered image frame as MCP image content, without writing it to disk"""
+    return Image(data=bytes(image), format=header["mime_type"].split("/")[1])
+
+@mcp.tool()
+def render_views(ctx: Context, node_id: int, views: List[str] = None, tile_size: int = 512, quality: str = "preview") -> List[str | Image]:
+    """Render several views of a node's output into one grid image
+    Parameters:
+    - node_id: The id of the node to render
+    - views: Any of [front, back, side, top, bottom, iso], defaults to [front, side, top, iso]
+    - tile_size: Resolution of each view in pixels
+    - quality: Quality tier (thumbnail, preview or final), controls format and antialiasing
+
+    Returns:
+    - The layout of the views in the grid, and the grid image
+    """
+    try:
+        blender = get_blender_connection()
+        result, frames = blender.send_command_binary("render_views", {"node_id": node_id, "views": views, "tile_size": tile_size, "tier": quality})
+    except Exception as e:
+        return [f"Error with command render_views: {str(e)}"]
+
+    if result.get("status") != "success":
+        return [json.dumps(result)]
+
+    layout = json.dumps({"layout": result["result"]["layout"]})
+    return [layout, image_from_frame(result["result"]["frames"][0], frames["image"])]
 
 def load_node_data():
     global node_data
@@ -362,5 +775,5 @@ def load_node_data():
 if __name__ == "__main__":
     load_node_data()
     get_blender_connection()
-    send_blender_command("set_img_filepath", {"filepath": os.path.abspath("./viewport_render.png")})
+    send_blender_command("set_img_filepath", {"filepath": img_filepath})
     mcp.run(transport='stdio')
\ No newline at end of file
@@ -0,0 +1,155 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+from abc import ABC, abstractmethod
+
+from dotenv import load_dotenv
+
+retryable_status_codes = {429, 500, 502, 503, 504}
+
+
+class VisionBackend(ABC):
+    """A vision model provider. SDKs are imported and clients constructed on first use, not at import.
+
+    Request contents are a list of prompt strings and (image bytes, mime type) tuples.
+    """
+    name = None
+    default_model = None
+
+    def __init__(self, model: str = None):
+        self.model = model or os.getenv("VISION_MODEL") or self.default_model
+
+    @abstractmethod
+    async def generate(self, contents, json_response: bool = False) -> str:
+        """Send one request and return the response text"""
+
+    def is_retryable(self, error: Exception) -> bool:
+        return isinstance(error, (ConnectionError, asyncio.TimeoutError))
+
+
+class GeminiBackend(VisionBackend):
+    name = "gemini"
+    default_model = "gemini-2.0-flash"
+
+    def __init__(self, model: str = None):
+        super().__init__(model or os.getenv("GEMINI_MODEL"))
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from google import genai
+            from google.genai import types
+
+            # GEMINI_BASE_URL points the client at a local stand-in server for testing
+            base_url = os.getenv("GEMINI_BASE_URL")
+            http_options = types.HttpOptions(base_url=base_url) if base_url else None
+            self._client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"), http_options=http_options)
+        return self._client
+
+    async def generate(self, contents, json_response: bool = False) -> str:
+        from google.genai import types
+
+        parts = [c if isinstance(c, str) else types.Part.from_bytes(data=c[0], mime_type=c[1]) for c in contents]
+        config = types.GenerateContentConfig(response_mime_type="application/json") if json_response else None
+        response = await self.client.aio.models.generate_content(model=self.model, contents=parts, config=config)
+        return response.text
+
+    def is_retryable(self, error: Exception) -> bool:
+        from google.genai import errors
+
+        if isinstance(error, errors.APIError):
+            return error.code in retryable_status_codes
+        return super().is_retryable(error)
+
+
+class OpenAIBackend(VisionBackend):
+    name = "openai"
+    default_model = "gpt-4o-mini"
+
+    def __init__(self, model: str = None):
+        super().__init__(model)
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import AsyncOpenAI
+            self._client = AsyncOpenAI(base_url=os.getenv("OPENAI_BASE_URL"))
+        return self._client
+
+    async def generate(self, contents, json_response: bool = False) -> str:
+        content = []
+        for c in contents:
+            if isinstance(c, str):
+                content.append({"type": "text", "text": c})
+            else:
+                data = base64.b64encode(c[0]).decode('utf-8')
+                content.append({"type": "image_url", "image_url": {"url": f"data:{c[1]};base64,{data}"}})
+
+        options = {}
+        if json_response:
+            # json_object mode only returns objects, so the verdict array is asked for under a "verdicts" key
+            content.append({"type": "text", "text": 'Wrap the array in a JSON object: {"verdicts": [...]}'})
+            options["response_format"] = {"type": "json_object"}
+
+        response = await self.client.chat.completions.create(model=self.model, messages=[{"role": "user", "content": content}], **options)
+        text = response.choices[0].message.content
+        if json_response:
+            try:
+                return json.dumps(json.loads(text)["verdicts"])
+            except (json.JSONDecodeError, KeyError, TypeError):
+                return text
+        return text
+
+    def is_retryable(self, error: Exception) -> bool:
+        import openai
+
+        if isinstance(error, openai.APIConnectionError):
+            return True
+        return getattr(error, "status_code", None) in retryable_status_codes or super().is_retryable(error)
+
+
+class LocalBackend(VisionBackend):
+    """Offline stand-in with deterministic answers derived from the request, for tests and benchmarks.
+    VISION_LOCAL_LATENCY adds a fixed delay in seconds to mimic a remote model."""
+    name = "local"
+    default_model = "local-mock"
+
+    def __init__(self, model: str = None):
+        super().__init__(model)
+        self.latency = float(os.getenv("VISION_LOCAL_LATENCY", "0"))
+
+    async def generate(self, contents, json_response: bool = False) -> str:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        images = [c for c in contents if not isinstance(c, str)]
+        digests = [hashlib.sha256(image_bytes).hexdigest()[:12] for image_bytes, mime_type in images]
+        if json_response:
+            return json.dumps([{"image": i + 1, "matches": True, "details": f"local backend: image {digest}"} for i, digest in enumerate(digests)])
+        return f"local backend: {len(images)} image(s) {', '.join(digests)}, the geometry matches the description."
+
+
+backends = {backend.name: backend for backend in (GeminiBackend, OpenAIBackend, LocalBackend)}
+
+_backend = None
+
+
+def get_backend() -> VisionBackend:
+    """The configured vision backend (VISION_BACKEND, default gemini), constructed on first use"""
+    global _backend
+    if _backend is None:
+        load_dotenv()
+        name = os.getenv("VISION_BACKEND", "gemini")
+        if name not in backends:
+            raise ValueError(f"Unknown vision backend {name}. Available backends: {list(backends.keys())}")
+        _backend = backends[name]()
+    return _backend
+
+
+def set_backend(backend: VisionBackend):
+    global _backend
+    _backend = backend